@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: leituras síncronas (WSGI) x assíncronas (ASGI) com clientes lentos.
+
+Alguns clientes baixam um material bem devagar (como em redes móveis)
+enquanto outros fazem GETs rápidos na listagem de cursos. No WSGI cada
+download lento prende um worker; no ASGI o download é um iterador
+assíncrono e as listagens continuam sendo atendidas.
+
+Exemplo (dois terminais, a partir de my_school/):
+    gunicorn my_school.wsgi -w 4 -b 127.0.0.1:8001
+    uvicorn my_school.asgi:application --workers 1 --port 8002
+
+    python benchmark_async.py --material 1 \\
+        --wsgi http://127.0.0.1:8001 --asgi http://127.0.0.1:8002
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+import requests
+
+
+def login(base_url, username, password):
+    response = requests.post(f"{base_url}/api/token/", json={"username": username, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access']}"}
+
+
+def slow_download(url, headers, stop, chunk_size, delay):
+    """Lê o arquivo em pedaços pequenos, com pausa entre eles, até `stop`"""
+    while not stop.is_set():
+        try:
+            with requests.get(url, headers=headers, stream=True, timeout=60) as response:
+                for _ in response.iter_content(chunk_size):
+                    if stop.is_set():
+                        return
+                    time.sleep(delay)
+        except requests.RequestException:
+            return
+
+
+def fast_requests(url, headers, count, timeout, latencies, failures, lock):
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            response = requests.get(url, headers=headers, timeout=timeout)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            if ok:
+                latencies.append(elapsed)
+            else:
+                failures.append(elapsed)
+
+
+def run(name, base_url, prefix, args, headers):
+    download_url = f"{base_url}{prefix}/materials/{args.material}/download/"
+    list_url = f"{base_url}{prefix}/courses/"
+
+    stop = threading.Event()
+    slow = [
+        threading.Thread(target=slow_download, args=(download_url, headers, stop, args.chunk_size, args.delay), daemon=True)
+        for _ in range(args.slow_clients)
+    ]
+    for thread in slow:
+        thread.start()
+    time.sleep(args.warmup)
+
+    latencies, failures, lock = [], [], threading.Lock()
+    fast = [
+        threading.Thread(target=fast_requests, args=(list_url, headers, args.requests, args.timeout, latencies, failures, lock))
+        for _ in range(args.fast_clients)
+    ]
+    start = time.perf_counter()
+    for thread in fast:
+        thread.start()
+    for thread in fast:
+        thread.join()
+    total = time.perf_counter() - start
+    stop.set()
+
+    print(f"\n{name} ({base_url}{prefix}/)")
+    print(f"  {args.slow_clients} downloads lentos, {args.fast_clients}x{args.requests} GETs em {list_url}")
+    print(f"  concluídos: {len(latencies)}  falhas/timeouts: {len(failures)}  tempo total: {total:.2f}s")
+    if latencies:
+        latencies.sort()
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+        print(f"  latência p50: {statistics.median(latencies) * 1000:.1f} ms  p95: {p95 * 1000:.1f} ms")
+        print(f"  vazão: {len(latencies) / total:.1f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wsgi", default="http://127.0.0.1:8001", help="servidor WSGI (rotas /api/)")
+    parser.add_argument("--asgi", default="http://127.0.0.1:8002", help="servidor ASGI (rotas /api/async/)")
+    parser.add_argument("--username", default="prof1")
+    parser.add_argument("--password", default="123456")
+    parser.add_argument("--material", type=int, required=True, help="id de um material com arquivo grande")
+    parser.add_argument("--slow-clients", type=int, default=8)
+    parser.add_argument("--fast-clients", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=25, help="GETs por cliente rápido")
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    parser.add_argument("--delay", type=float, default=0.05, help="pausa entre pedaços do download lento")
+    parser.add_argument("--warmup", type=float, default=1.0, help="segundos até os clientes lentos ocuparem o servidor")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    for name, base_url, prefix in [("WSGI", args.wsgi, "/api"), ("ASGI", args.asgi, "/api/async")]:
+        run(name, base_url, prefix, args, login(base_url, args.username, args.password))
+
+
+if __name__ == "__main__":
+    main()
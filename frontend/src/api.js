@@ -35,4 +35,16 @@ api.interceptors.response.use(
   }
 );
 
-export default api; 
\ No newline at end of file
+// Segue o cursor `next` até o fim e devolve todos os itens da listagem
+export async function fetchAllPages(url, config) {
+  const items = [];
+  let next = url;
+  while (next) {
+    const response = await api.get(next, next === url ? config : undefined);
+    items.push(...response.data.results);
+    next = response.data.next;
+  }
+  return items;
+}
+
+export default api;
\ No newline at end of file
@@ -10,6 +10,8 @@ export default function Courses() {
   const [error, setError] = useState(null);
   const [editingCourse, setEditingCourse] = useState(null);
   const [editForm, setEditForm] = useState({});
+  // Cursores da paginação (a API devolve 50 cursos por página)
+  const [page, setPage] = useState({ current: 'courses/', next: null, previous: null });
   
   const { isTeacher, loading: roleLoading } = useUserRole();
 
@@ -18,13 +20,18 @@ export default function Courses() {
     fetchCourses();
   }, []);
 
-  const fetchCourses = async () => {
+  const fetchCourses = async (url = page.current) => {
     try {
       setLoading(true);
-      console.log('📡 Fazendo requisição para courses/');
-      const response = await api.get('courses/');
+      console.log('📡 Fazendo requisição para', url);
+      const response = await api.get(url);
       console.log('✅ Cursos recebidos:', response.data);
-      setCourses(response.data);
+      // Página esvaziada (ex.: último curso excluído): volta para a anterior
+      if (response.data.results.length === 0 && response.data.previous) {
+        return fetchCourses(response.data.previous);
+      }
+      setCourses(response.data.results);
+      setPage({ current: url, next: response.data.next, previous: response.data.previous });
       setError(null);
     } catch (err) {
       console.error('❌ Erro ao buscar cursos:', err);
@@ -327,7 +334,7 @@ export default function Courses() {
                         fontWeight: 'bold',
                         color: '#1976d2'
                       }}>
-                        {course.materials?.length || 0}
+                        {course.materials_count || 0}
                       </div>
                       <div style={{ 
                         fontSize: '12px',
@@ -348,7 +355,7 @@ export default function Courses() {
                         fontWeight: 'bold',
                         color: '#7b1fa2'
                       }}>
-                        {course.quizzes?.length || 0}
+                        {course.quizzes_count || 0}
                       </div>
                       <div style={{ 
                         fontSize: '12px',
@@ -452,6 +459,35 @@ export default function Courses() {
             </div>
           ))}
         </div>
+
+        {(page.previous || page.next) && (
+          <div style={{
+            display: 'flex',
+            justifyContent: 'center',
+            gap: '10px',
+            marginTop: '30px'
+          }}>
+            {[['← Anterior', page.previous], ['Próxima →', page.next]].map(([label, url]) => (
+              <button
+                key={label}
+                onClick={() => fetchCourses(url)}
+                disabled={!url}
+                style={{
+                  backgroundColor: url ? '#007bff' : '#ccc',
+                  color: 'white',
+                  border: 'none',
+                  padding: '10px 16px',
+                  borderRadius: '6px',
+                  fontSize: '14px',
+                  fontWeight: 'bold',
+                  cursor: url ? 'pointer' : 'default'
+                }}
+              >
+                {label}
+              </button>
+            ))}
+          </div>
+        )}
       </div>
     </Layout>
   );
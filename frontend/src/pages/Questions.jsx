@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
-import api from '../api';
+import api, { fetchAllPages } from '../api';
 import { useUserRole } from '../hooks/useUserRole';
 import Layout from '../components/Layout';
 
@@ -22,9 +22,9 @@ export default function Questions() {
     try {
       setLoading(true);
       console.log('📡 Fazendo requisição para questions/ (todas as questões)');
-      const response = await api.get('questions/');
-      console.log('✅ Questões recebidas:', response.data);
-      setQuestions(response.data);
+      const results = await fetchAllPages('questions/');
+      console.log('✅ Questões recebidas:', results.length);
+      setQuestions(results);
       setError(null);
     } catch (err) {
       console.error('❌ Erro ao buscar questões:', err);
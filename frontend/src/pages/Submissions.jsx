@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
-import api from '../api';
+import api, { fetchAllPages } from '../api';
 import { useUserRole } from '../hooks/useUserRole';
 import Layout from '../components/Layout';
 
@@ -21,9 +21,10 @@ export default function Submissions() {
     try {
       setLoading(true);
       console.log('📡 Fazendo requisição para submissions/');
-      const response = await api.get('submissions/');
-      console.log('✅ Submissões recebidas:', response.data);
-      setSubmissions(response.data);
+      // As médias são calculadas aqui, então é preciso a lista inteira
+      const results = await fetchAllPages('submissions/');
+      console.log('✅ Submissões recebidas:', results.length);
+      setSubmissions(results);
       setError(null);
     } catch (err) {
       console.error('❌ Erro ao buscar submissões:', err);
@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
-import api from '../api';
+import api, { fetchAllPages } from '../api';
 import Layout from '../components/Layout';
 
 export default function Users() {
@@ -15,14 +15,14 @@ export default function Users() {
     async function fetchData() {
       try {
         console.log('🔄 Carregando dados de usuários e grupos...');
-        const [grpRes, usrRes] = await Promise.all([
-          api.get('groups/'),
-          api.get('users/')
+        const [groupList, userList] = await Promise.all([
+          fetchAllPages('groups/'),
+          fetchAllPages('users/')
         ]);
-        console.log('✅ Grupos carregados:', grpRes.data);
-        console.log('✅ Usuários carregados:', usrRes.data);
-        setGroups(grpRes.data);
-        setUsers(usrRes.data);
+        console.log('✅ Grupos carregados:', groupList.length);
+        console.log('✅ Usuários carregados:', userList.length);
+        setGroups(groupList);
+        setUsers(userList);
       } catch (err) {
         console.error('❌ Erro ao carregar dados:', err);
         setError('Erro ao carregar dados');
@@ -61,8 +61,7 @@ export default function Users() {
       alert(`Role ${role} atribuída com sucesso!`);
       
       // Recarregar dados
-      const usersResponse = await api.get('users/');
-      setUsers(usersResponse.data);
+      setUsers(await fetchAllPages('users/'));
     } catch (err) {
       console.error('❌ Erro ao atribuir role:', err);
       alert('Erro ao atribuir role: ' + (err.response?.data?.detail || 'Erro desconhecido'));
@@ -76,8 +75,7 @@ export default function Users() {
       alert(`Usuário removido do grupo ${groupName} com sucesso!`);
       
       // Recarregar dados
-      const usersResponse = await api.get('users/');
-      setUsers(usersResponse.data);
+      setUsers(await fetchAllPages('users/'));
     } catch (err) {
       console.error('❌ Erro ao remover do grupo:', err);
       alert('Erro ao remover do grupo: ' + (err.response?.data?.detail || 'Erro desconhecido'));
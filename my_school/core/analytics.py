@@ -0,0 +1,116 @@
+"""Análise de itens (dificuldade, discriminação e distratores) de um quiz.
+
+As respostas viram uma matriz alunos × questões de códigos uint8
+(0 = em branco, 1..4 = A..D) e todo o cálculo é vetorizado com NumPy.
+"""
+import json
+from itertools import islice
+
+from django.db.models import TextField
+from django.db.models.functions import Cast
+
+try:
+    import numpy as np
+except ImportError:  # dependência opcional
+    np = None
+
+from .models import Answer, Question, Submission
+
+BLANK = 0
+BATCH_SIZE = 10000
+
+
+class _OptionCodes(dict):
+    # Respostas ausentes ou inválidas contam como em branco
+    def __missing__(self, option):
+        return BLANK
+
+
+# Mesmos códigos da tabela Answer
+OPTIONS = [option for _, option in Answer.OPTION_CHOICES]
+OPTION_CODES = _OptionCodes((option, code) for code, option in Answer.OPTION_CHOICES)
+
+
+def is_available():
+    return np is not None
+
+
+def _decode(documents, keys):
+    """Códigos (bytes, linha a linha) de um lote de respostas em JSON"""
+    # Um único json.loads para o lote, em vez de um por submissão
+    rows = json.loads('[' + ','.join(documents) + ']')
+    empty = {}
+    values = [(row if isinstance(row, dict) else empty).get(key) for row in rows for key in keys]
+    try:
+        return bytes(map(OPTION_CODES.__getitem__, values))
+    except TypeError:
+        # Valor não hashable (lista, objeto) no lugar de uma opção
+        return bytes(OPTION_CODES[value] if isinstance(value, str) else BLANK for value in values)
+
+
+def load_matrix(quiz_id):
+    """Devolve (ids das questões, códigos do gabarito, matriz de respostas)"""
+    questions = list(Question.objects.filter(quiz_id=quiz_id).order_by('id').values_list('id', 'correct_option'))
+    keys = [str(question_id) for question_id, _ in questions]
+    answer_key = np.array([OPTION_CODES[option] for _, option in questions], dtype=np.uint8)
+
+    # O texto cru do JSON evita a decodificação linha a linha do JSONField
+    documents = (
+        Submission.objects.filter(quiz_id=quiz_id)
+        .values_list(Cast('answers', TextField()), flat=True)
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+    data = bytearray()
+    count = 0
+    while batch := list(islice(documents, BATCH_SIZE)):
+        data += _decode(batch, keys)
+        count += len(batch)
+    matrix = np.frombuffer(bytes(data), dtype=np.uint8).reshape(count, len(keys))
+    return [question_id for question_id, _ in questions], answer_key, matrix
+
+
+def _point_biserial(correct, total):
+    """Correlação de cada questão com a nota no restante da prova (item-resto)"""
+    rest = total[:, None] - correct
+    x = correct - correct.mean(axis=0)
+    y = rest - rest.mean(axis=0)
+    denominator = np.sqrt((x * x).sum(axis=0) * (y * y).sum(axis=0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denominator > 0, (x * y).sum(axis=0) / denominator, np.nan)
+
+
+def item_analysis(quiz_id):
+    """p-valor, ponto-bisserial e distribuição das opções de cada questão"""
+    question_ids, answer_key, matrix = load_matrix(quiz_id)
+    n_students, n_questions = matrix.shape
+
+    if n_students:
+        correct = (matrix == answer_key).astype(np.float64)
+        total = correct.sum(axis=1)
+        p_values = correct.mean(axis=0)
+        point_biserial = _point_biserial(correct, total)
+    else:
+        p_values = point_biserial = np.full(n_questions, np.nan)
+
+    # Contagem por (questão, opção) com um único bincount
+    n_codes = len(OPTIONS) + 1
+    offsets = np.arange(n_questions, dtype=np.int64) * n_codes
+    distribution = np.bincount(
+        (matrix + offsets).ravel(), minlength=n_questions * n_codes
+    ).reshape(n_questions, n_codes)
+
+    def number(value):
+        return None if np.isnan(value) else round(float(value), 4)
+
+    items = []
+    for column, question_id in enumerate(question_ids):
+        options = {option: int(distribution[column, code]) for option, code in OPTION_CODES.items()}
+        options['blank'] = int(distribution[column, BLANK])
+        items.append({
+            'question': question_id,
+            'correct_option': OPTIONS[answer_key[column] - 1] if answer_key[column] else None,
+            'p_value': number(p_values[column]),
+            'point_biserial': number(point_biserial[column]),
+            'options': options,
+        })
+    return {'quiz': quiz_id, 'submissions': n_students, 'questions': items}
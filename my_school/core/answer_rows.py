@@ -0,0 +1,31 @@
+from django.conf import settings
+
+from .grading import get_answer_keys
+from .models import Answer
+
+OPTION_CODES = {option: code for code, option in Answer.OPTION_CHOICES}
+
+
+def build_rows(submissions):
+    """Linhas de Answer das submissões; ignora questões de fora do quiz e opções inválidas"""
+    answer_keys = get_answer_keys(submission.quiz_id for submission in submissions)
+    rows = []
+    for submission in submissions:
+        if not isinstance(submission.answers, dict):
+            continue
+        answer_key = answer_keys[submission.quiz_id]
+        for question_id, option in submission.answers.items():
+            if question_id in answer_key and isinstance(option, str) and option in OPTION_CODES:
+                rows.append(Answer(
+                    submission_id=submission.pk, question_id=int(question_id), option=OPTION_CODES[option],
+                ))
+    return rows
+
+
+def write(submissions, replace=False):
+    """Grava as respostas normalizadas das submissões (já salvas)"""
+    if not settings.SUBMISSION_ANSWER_ROWS or not submissions:
+        return
+    if replace:
+        Answer.objects.filter(submission_id__in=[submission.pk for submission in submissions]).delete()
+    Answer.objects.bulk_create(build_rows(submissions), batch_size=1000)
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'core' 
\ No newline at end of file
+    name = 'core'
+
+    def ready(self):
+        from . import checks
+        from . import signals  # noqa: F401
+        from . import jobs  # noqa: F401  (registra as tarefas)
+
+        errors = checks.shared_caches()
+        if errors and not settings.DEBUG:
+            raise ImproperlyConfigured(f'{errors[0].msg}; {errors[0].hint}')
@@ -0,0 +1,169 @@
+"""Leituras assíncronas (ASGI) de cursos, quizzes e materiais, em api/async/.
+
+Devolvem o mesmo JSON de list/retrieve da API síncrona. As consultas usam o
+ORM assíncrono (aget, async for) e os arquivos saem por um iterador
+assíncrono, então um cliente lento não prende um worker. A configuração
+(filtros, ordenação, paginação) vem dos próprios viewsets; a autenticação é
+só por JWT. `?fields=` é aplicado à representação completa; `?expand=` não é
+suportado aqui.
+"""
+import os
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from . import fastpath, sparse
+from .authentication import ClaimsJWTAuthentication
+from .downloads import aserve_file
+from .models import Material
+from .replicas import reads_from_replica, release_replica, use_replica
+from .views import CourseViewSet, MaterialViewSet, QuizViewSet
+
+
+class AsyncReadView(View):
+    """GET assíncrono de list (`many = True`) ou retrieve sobre um viewset síncrono"""
+    http_method_names = ['get', 'head', 'options']
+    viewset_class = None
+    many = False
+    authenticator = ClaimsJWTAuthentication()
+
+    def get_queryset(self, viewset):
+        return viewset.get_fast_queryset()
+
+    async def represent(self, rows, request):
+        raise NotImplementedError
+
+    def _authenticate(self, request):
+        # Síncrono: a verificação da claim `ver` pode consultar o banco
+        result = self.authenticator.authenticate(request)
+        if result is None:
+            raise exceptions.NotAuthenticated()
+        request.user = result[0]
+        return reads_from_replica(request)
+
+    def render(self, data, status=200, headers=None):
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+        return HttpResponse(renderer.render(data), status=status, headers=headers,
+                            content_type=renderer.media_type)
+
+    def handle_exception(self, request, exc):
+        response = exception_handler(exc, {'request': request})
+        headers = {header: value for header, value in response.headers.items() if header != 'Content-Type'}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response.status_code = 401
+            headers['WWW-Authenticate'] = self.authenticator.authenticate_header(request)
+        return self.render(response.data, response.status_code, headers)
+
+    async def get(self, request, *args, **kwargs):
+        replica_token = None
+        try:
+            if await sync_to_async(self._authenticate)(request):
+                replica_token = use_replica()
+            return await self.respond(request, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(request, exc)
+        finally:
+            if replica_token is not None:
+                release_replica(replica_token)
+
+    async def respond(self, request, **kwargs):
+        drf_request = Request(request)
+        drf_request.user = request.user
+        viewset = self.viewset_class(
+            action='list' if self.many else 'retrieve', request=drf_request, kwargs=kwargs, format_kwarg=None,
+        )
+        fields = self.get_fields(viewset)
+        # filter_queryset valida os filtros (que podem consultar o banco) sem avaliar o queryset
+        queryset = await sync_to_async(viewset.filter_queryset)(self.get_queryset(viewset))
+
+        if not self.many:
+            try:
+                row = await queryset.aget(pk=kwargs['pk'])
+            except (ObjectDoesNotExist, ValueError):
+                raise exceptions.NotFound(f'No {queryset.model._meta.object_name} matches the given query.')
+            return self.render(sparse.select((await self.represent([row], request))[0], fields))
+
+        if viewset.paginator is None:
+            return self.render(sparse.select(await self.represent([row async for row in queryset], request), fields))
+        # A paginação por cursor do DRF é síncrona: avalia a página no thread do ORM
+        page = await sync_to_async(viewset.paginate_queryset)(queryset)
+        data = sparse.select(await self.represent(page, request), fields)
+        return self.render(viewset.get_paginated_response(data).data)
+
+    def get_fields(self, viewset):
+        """Árvore de ?fields= já validada contra o serializer do viewset, ou None"""
+        params = viewset.get_sparse_params()
+        if params is None:
+            return None
+        fields, expand = params
+        if expand is not None:
+            raise exceptions.ParseError(f'{sparse.EXPAND_PARAM} não é suportado em api/async/; use a API síncrona')
+        sparse.prune(viewset.get_serializer_class()(context=viewset.get_serializer_context()), fields)
+        return fields
+
+
+class CourseListView(AsyncReadView):
+    viewset_class = CourseViewSet
+    many = True
+
+    async def represent(self, rows, request):
+        return await fastpath.acourse_list(rows)
+
+
+class CourseDetailView(AsyncReadView):
+    viewset_class = CourseViewSet
+
+    async def represent(self, rows, request):
+        return await fastpath.acourse_detail(rows, request)
+
+
+class QuizListView(AsyncReadView):
+    viewset_class = QuizViewSet
+    many = True
+
+    async def represent(self, rows, request):
+        return await fastpath.aquiz_list(rows)
+
+
+class QuizDetailView(AsyncReadView):
+    viewset_class = QuizViewSet
+
+    async def represent(self, rows, request):
+        return await fastpath.aquiz_detail(rows)
+
+
+class MaterialReadView(AsyncReadView):
+    viewset_class = MaterialViewSet
+
+    def get_queryset(self, viewset):
+        return Material.objects.values(*fastpath.MATERIAL_FIELDS)
+
+    async def represent(self, rows, request):
+        return await fastpath.amaterial_list(rows, request)
+
+
+class MaterialListView(MaterialReadView):
+    many = True
+
+
+class MaterialDetailView(MaterialReadView):
+    pass
+
+
+class MaterialDownloadView(AsyncReadView):
+    async def respond(self, request, pk=None):
+        try:
+            material = await Material.objects.aget(pk=pk)
+        except (Material.DoesNotExist, ValueError):
+            raise exceptions.NotFound('No Material matches the given query.')
+        if not material.file:
+            return self.render({'detail': 'material sem arquivo'}, status=404)
+        # O nome no storage é o hash do conteúdo; o download usa o título
+        ext = os.path.splitext(material.file.name)[1]
+        return await aserve_file(request, material.file, filename=f'{material.title}{ext}')
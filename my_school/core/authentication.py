@@ -0,0 +1,134 @@
+from types import SimpleNamespace
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils.functional import cached_property
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import Profile
+
+TOKEN_VERSION_CLAIM = 'ver'
+TOKEN_VERSION_TIMEOUT = 60 * 60
+
+
+def _token_version_cache_key(user_id):
+    return f'core:user:{user_id}:token_version'
+
+
+def get_token_state(user_id):
+    """(versão dos tokens, usuário ativo), em cache até o próximo bump_token_version.
+
+    O cache 'default' precisa ser compartilhado entre os processos (ver
+    CACHE_BACKEND e core.checks), senão a revogação não chega aos outros workers.
+    """
+    key = _token_version_cache_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = User.objects.filter(pk=user_id).values_list('profile__token_version', 'is_active').first()
+        state = (row[0] or 0, row[1]) if row else (0, False)
+        cache.set(key, state, TOKEN_VERSION_TIMEOUT)
+    return state
+
+
+def get_token_version(user_id):
+    return get_token_state(user_id)[0]
+
+
+def bump_token_version(*user_ids):
+    """Invalida os tokens já emitidos para os usuários (mudança de papel, staff ou desativação)"""
+    for user_id in user_ids:
+        # get_or_create tolera duas mudanças concorrentes para um usuário sem Profile;
+        # o incremento com F() não perde nenhuma das duas
+        Profile.objects.get_or_create(user_id=user_id)
+        Profile.objects.filter(user_id=user_id).update(token_version=F('token_version') + 1)
+    # De novo após o commit: até lá uma leitura concorrente pode recolocar a versão antiga
+    keys = [_token_version_cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def add_user_claims(token, user):
+    """Copia para o token os dados usados pelas permissões e por users/me/"""
+    token['username'] = user.username
+    token['email'] = user.email
+    token['first_name'] = user.first_name
+    token['last_name'] = user.last_name
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token['groups'] = [{'id': group.id, 'name': group.name} for group in user.groups.all()]
+    token[TOKEN_VERSION_CLAIM] = get_token_version(user.pk)
+    return token
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        # Reemite o access token com os papéis atuais do usuário
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        user = User.objects.prefetch_related('groups').get(pk=access[api_settings.USER_ID_CLAIM])
+        data['access'] = str(add_user_claims(access, user))
+        return data
+
+
+class ClaimsUser(TokenUser):
+    """Usuário montado só com as claims do token, sem acesso ao banco"""
+
+    @cached_property
+    def id(self):
+        # A claim vem como string; o pk precisa ter o mesmo tipo do User
+        return User._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def groups(self):
+        return [SimpleNamespace(**group) for group in self.token.get('groups', [])]
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que dispensa a leitura do usuário em métodos seguros.
+
+    Leituras recebem um ClaimsUser; escritas continuam carregando o User,
+    pois ele é gravado como teacher/owner/student. Em ambos os casos os
+    papéis vêm das claims; tokens de usuários desativados e tokens emitidos
+    antes de uma mudança de papel (claim `ver` desatualizada) são recusados.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        if 'groups' not in validated_token:
+            # Token emitido antes das claims de papel
+            return self.get_user(validated_token), validated_token
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        version, is_active = get_token_state(user_id)
+        if not is_active:
+            raise AuthenticationFailed('Usuário inativo ou inexistente', code='user_inactive')
+        if validated_token.get(TOKEN_VERSION_CLAIM) != version:
+            raise InvalidToken('Token desatualizado, faça login novamente')
+
+        if request.method in SAFE_METHODS:
+            user = ClaimsUser(validated_token)
+        else:
+            user = self.get_user(validated_token)
+        user._core_roles = frozenset(group['name'] for group in validated_token['groups'])
+        return user, validated_token
@@ -0,0 +1,25 @@
+"""Verificações de configuração.
+
+Caches por processo (locmem) quebram as invalidações entre workers: fora do
+DEBUG o app se recusa a subir com eles (CoreConfig.ready), e `manage.py
+check --deploy` aponta o problema.
+"""
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Caches cujo conteúdo precisa ser o mesmo em todos os processos
+SHARED_CACHES = ('default', 'responses')
+PER_PROCESS_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register(deploy=True)
+def shared_caches(app_configs=None, **kwargs):
+    return [
+        Error(
+            f"o cache '{alias}' é por processo ({settings.CACHES[alias]['BACKEND']})",
+            hint='use CACHE_BACKEND=file (um host) ou redis; invalidações de um worker não chegam aos outros',
+            id='core.E001',
+        )
+        for alias in SHARED_CACHES
+        if settings.CACHES.get(alias, {}).get('BACKEND') in PER_PROCESS_BACKENDS
+    ]
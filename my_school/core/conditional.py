@@ -0,0 +1,85 @@
+import hashlib
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth.models import User
+from django.db.models import Count, Max, Q, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import Profile
+from .response_cache import USERS_SCOPE, get_generations
+
+
+class ConditionalGetMixin:
+    """ETag/Last-Modified em list/retrieve, calculados antes da serialização.
+
+    Os validadores saem de COUNT(*) e MAX(updated_at) de cada queryset em
+    `get_etag_querysets`; se o cliente já tem a versão atual recebe 304 sem
+    que os objetos sejam carregados.
+    """
+    conditional_actions = ('list', 'retrieve')
+
+    def get_etag_querysets(self):
+        if self.action == 'retrieve':
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            return [self.queryset.model._default_manager.filter(**{self.lookup_field: self.kwargs[lookup]})]
+        return [self.filter_queryset(self.queryset.model._default_manager.all())]
+
+    def get_validators(self, request):
+        parts = [type(self).__name__, self.action, request.get_full_path(), request.accepted_renderer.format,
+                 str(request.user.pk)]
+        last_modified = None
+        querysets = self.get_etag_querysets()
+        for queryset in querysets:
+            stats = queryset.order_by().aggregate(count=Count('pk'), last=Max('updated_at'))
+            parts.append(f"{stats['count']}:{stats['last'].timestamp() if stats['last'] else ''}")
+            if stats['last'] and (last_modified is None or stats['last'] > last_modified):
+                last_modified = stats['last']
+        parts.append(self._users_version(querysets))
+        etag = '"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+        return etag, last_modified.timestamp() if last_modified else None
+
+    def _users_version(self, querysets):
+        """Versão dos usuários embutidos nas respostas (professor, dono, aluno).
+
+        Soma os token_version (incrementados a cada mudança de papel) dos
+        usuários referenciados pelos querysets, mais a geração do escopo
+        `users` do cache de respostas, trocada quando qualquer usuário muda.
+        """
+        user_ids = [
+            queryset.order_by().values(field.attname)
+            for queryset in querysets
+            for field in queryset.model._meta.concrete_fields
+            if field.is_relation and field.related_model is User
+        ]
+        if not user_ids:
+            return ''
+        condition = reduce(or_, (Q(user_id__in=ids) for ids in user_ids))
+        version = Profile.objects.filter(condition).aggregate(version=Sum('token_version'))['version'] or 0
+        return f'users:{version}:{get_generations([USERS_SCOPE])[0]}'
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        if self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = self.get_validators(request)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            # O 304 repete os validadores e o Cache-Control da resposta completa
+            patch_cache_control(not_modified, private=True, no_cache=True)
+            not_modified['ETag'] = etag
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            # O navegador guarda a resposta, mas sempre revalida com If-None-Match
+            patch_cache_control(response, private=True, no_cache=True)
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
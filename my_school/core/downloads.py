@@ -0,0 +1,184 @@
+import asyncio
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(fieldfile, modified):
+    """ETag forte: o hash do conteúdo, se o storage souber, ou tamanho e data de modificação"""
+    content_hash = getattr(fieldfile.storage, 'content_hash', None)
+    digest = content_hash(fieldfile.name) if content_hash else None
+    if digest:
+        return f'"{digest}"'
+    return f'"{fieldfile.size:x}-{int(modified * 1000):x}"'
+
+
+def parse_range(header, size):
+    """Converte o cabeçalho Range em (início, fim) inclusivos.
+
+    Devolve None para ignorar o Range (sintaxe desconhecida, múltiplos
+    intervalos ou arquivo vazio, servidos como 200 completo) e False se for
+    insatisfazível.
+    """
+    match = RANGE_RE.match(header.strip())
+    if size == 0:
+        return None
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # bytes=-N: últimos N bytes
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def if_range_matches(value, etag, last_modified):
+    """If-Range com ETag forte igual ao atual ou com a data exata de modificação"""
+    if value.startswith('"'):
+        return value == etag
+    date = parse_http_date_safe(value)
+    return date is not None and date == int(last_modified)
+
+
+def _iter_range(file, start, end):
+    with file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _offload_response(fieldfile):
+    """Delega o envio ao servidor web (X-Sendfile / X-Accel-Redirect)"""
+    response = HttpResponse()
+    if settings.MATERIAL_DOWNLOAD_OFFLOAD == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MATERIAL_DOWNLOAD_ACCEL_PREFIX + fieldfile.name
+    else:
+        response['X-Sendfile'] = fieldfile.path
+    # O servidor web define o tamanho e trata o Range
+    del response['Content-Type']
+    return response
+
+
+def _prepare(request, fieldfile, filename):
+    """Validadores e Range do download.
+
+    Devolve (resposta pronta, None) para 304/416/offload, ou (None, plano)
+    com o intervalo a enviar e os cabeçalhos comuns.
+    """
+    filename = filename or os.path.basename(fieldfile.name)
+    size = fieldfile.size
+    last_modified = fieldfile.storage.get_modified_time(fieldfile.name).timestamp()
+    etag = file_etag(fieldfile, last_modified)
+    headers = {
+        'Content-Disposition': content_disposition_header(True, filename),
+        'Accept-Ranges': 'bytes',
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+    }
+
+    # HTTP-date tem resolução de segundos; com a fração If-Modified-Since nunca bateria
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if not_modified is not None:
+        # O 304 precisa repetir os validadores para o cliente atualizar o cache
+        not_modified['ETag'] = etag
+        not_modified['Last-Modified'] = headers['Last-Modified']
+        return not_modified, None
+
+    if settings.MATERIAL_DOWNLOAD_OFFLOAD:
+        response = _offload_response(fieldfile)
+        for header, value in headers.items():
+            response[header] = value
+        return response, None
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    if range_header and (if_range is None or if_range_matches(if_range, etag, last_modified)):
+        byte_range = parse_range(range_header, size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response, None
+
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    return None, (byte_range, size, content_type, headers)
+
+
+def _streaming_response(content, byte_range, size, content_type, headers):
+    if byte_range:
+        start, end = byte_range
+        response = StreamingHttpResponse(content, status=206, content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Length'] = str(size)
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def serve_file(request, fieldfile, filename=None):
+    """Resposta de download de um FileField em blocos, com Range e GET condicional"""
+    response, plan = _prepare(request, fieldfile, filename)
+    if response is not None:
+        return response
+    byte_range, size, content_type, headers = plan
+    if byte_range:
+        start, end = byte_range
+        return _streaming_response(_iter_range(fieldfile.open('rb'), start, end), *plan)
+
+    # FileResponse usa wsgi.file_wrapper (sendfile) quando disponível
+    response = FileResponse(fieldfile.open('rb'), content_type=content_type)
+    response.block_size = CHUNK_SIZE
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+async def _aiter_range(file, start, end):
+    # Leitura do disco em threads; o event loop fica livre enquanto o cliente é lento
+    try:
+        await asyncio.to_thread(file.seek, start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(file.read, min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(file.close)
+
+
+async def aserve_file(request, fieldfile, filename=None):
+    """Versão assíncrona de serve_file para ASGI: o arquivo é enviado por um iterador assíncrono"""
+    response, plan = await asyncio.to_thread(_prepare, request, fieldfile, filename)
+    if response is not None:
+        return response
+    byte_range, size = plan[0], plan[1]
+    start, end = byte_range or (0, size - 1)
+    file = await asyncio.to_thread(fieldfile.open, 'rb')
+    return _streaming_response(_aiter_range(file, start, end), *plan)
@@ -0,0 +1,294 @@
+"""Representações somente leitura montadas a partir de `.values()`.
+
+Produzem exatamente a mesma saída dos ModelSerializers de core.serializers
+(mesmas chaves, mesma ordem, mesmos formatos), mas sem instanciar modelos
+nem a árvore de campos do DRF por objeto. Usadas por FastReadMixin em
+list/retrieve de métodos seguros; core.tests.FastPathTests confere a paridade.
+"""
+from django.contrib.auth.models import User
+from django.shortcuts import get_object_or_404
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .models import Material, Question, Quiz
+
+USER_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name', 'is_staff', 'is_superuser')
+MATERIAL_FIELDS = ('id', 'title', 'description', 'file', 'uploaded_at', 'course_id', 'owner_id')
+QUIZ_FIELDS = ('id', 'title', 'description', 'course_id', 'owner_id', 'created_at')
+QUESTION_FIELDS = ('id', 'quiz_id', 'text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_option')
+
+# Mesma formatação do DateTimeField do DRF (fuso atual, "Z" para UTC)
+format_datetime = serializers.DateTimeField().to_representation
+
+
+def _datetime(value):
+    return format_datetime(value) if value is not None else None
+
+
+def _users_queries(user_ids):
+    memberships = (
+        User.groups.through.objects.filter(user_id__in=user_ids)
+        .order_by('user_id', 'group_id')
+        .values_list('user_id', 'group_id', 'group__name')
+    )
+    return User.objects.filter(pk__in=user_ids).values(*USER_FIELDS), memberships
+
+
+def load_users(user_ids):
+    """{id: representação do UserSerializer} em duas queries"""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    return _build_users(*_users_queries(user_ids))
+
+
+async def aload_users(user_ids):
+    user_ids = set(user_ids)
+    if not user_ids:
+        return {}
+    users, memberships = _users_queries(user_ids)
+    return _build_users([row async for row in users], [row async for row in memberships])
+
+
+def _build_users(users, memberships):
+    groups = {}
+    for user_id, group_id, name in memberships:
+        groups.setdefault(user_id, []).append({'id': group_id, 'name': name})
+    return {
+        row['id']: {
+            'id': row['id'],
+            'username': row['username'],
+            'email': row['email'],
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'groups': groups.get(row['id'], []),
+            'is_staff': row['is_staff'],
+            'is_superuser': row['is_superuser'],
+        }
+        for row in users
+    }
+
+
+def _file_url(storage, name, request):
+    # Igual ao FileField do DRF: URL absoluta quando há request
+    if not name:
+        return None
+    url = storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def _group_by(rows, key):
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row[key], []).append(row)
+    return grouped
+
+
+def _materials_query(course_ids):
+    # Ordenação padrão do modelo, como no prefetch
+    return Material.objects.filter(course_id__in=course_ids).values(*MATERIAL_FIELDS)
+
+
+def _quizzes_query(course_ids):
+    return Quiz.objects.filter(course_id__in=course_ids).values(*QUIZ_FIELDS)
+
+
+def _questions_query(quiz_ids):
+    return Question.objects.filter(quiz_id__in=quiz_ids).values(*QUESTION_FIELDS)
+
+
+def _build_questions(rows):
+    questions = {}
+    for row in rows:
+        questions.setdefault(row['quiz_id'], []).append({
+            'id': row['id'],
+            'quiz': row['quiz_id'],
+            'text': row['text'],
+            'option_a': row['option_a'],
+            'option_b': row['option_b'],
+            'option_c': row['option_c'],
+            'option_d': row['option_d'],
+            'correct_option': row['correct_option'],
+        })
+    return questions
+
+
+def material(row, users, request):
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'description': row['description'],
+        'file': _file_url(Material._meta.get_field('file').storage, row['file'], request),
+        'uploaded_at': _datetime(row['uploaded_at']),
+        'course': row['course_id'],
+        'owner': users.get(row['owner_id']),
+    }
+
+
+def quiz(row, users, questions=None):
+    """QuizSerializer com `questions`; QuizSummarySerializer com `questions_count`"""
+    data = {
+        'id': row['id'],
+        'title': row['title'],
+        'description': row['description'],
+        'course': row['course_id'],
+        'owner': users.get(row['owner_id']),
+        'created_at': _datetime(row['created_at']),
+    }
+    if questions is None:
+        if 'questions_count' in row:
+            data['questions_count'] = row['questions_count']
+    else:
+        data['questions'] = questions.get(row['id'], [])
+    return data
+
+
+def quiz_list(rows):
+    users = load_users(row['owner_id'] for row in rows)
+    return [quiz(row, users) for row in rows]
+
+
+def quiz_detail(rows):
+    questions = _build_questions(_questions_query([row['id'] for row in rows]))
+    users = load_users(row['owner_id'] for row in rows)
+    return [quiz(row, users, questions) for row in rows]
+
+
+async def aquiz_list(rows):
+    users = await aload_users(row['owner_id'] for row in rows)
+    return [quiz(row, users) for row in rows]
+
+
+async def aquiz_detail(rows):
+    questions = _build_questions([row async for row in _questions_query([row['id'] for row in rows])])
+    users = await aload_users(row['owner_id'] for row in rows)
+    return [quiz(row, users, questions) for row in rows]
+
+
+def course_list(rows):
+    return _course_list(rows, load_users(row['teacher_id'] for row in rows))
+
+
+async def acourse_list(rows):
+    return _course_list(rows, await aload_users(row['teacher_id'] for row in rows))
+
+
+def _course_list(rows, users):
+    items = []
+    for row in rows:
+        item = {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'teacher': users.get(row['teacher_id']),
+            'created_at': _datetime(row['created_at']),
+        }
+        # Contagens fora de ?fields= não são calculadas (ver CourseViewSet)
+        for name in ('materials_count', 'quizzes_count'):
+            if name in row:
+                item[name] = row[name]
+        items.append(item)
+    return items
+
+
+def _course_user_ids(rows, materials, quizzes):
+    # Professores, donos de materiais e de quizzes numa única carga
+    return (
+        [row['teacher_id'] for row in rows]
+        + [m['owner_id'] for course_materials in materials.values() for m in course_materials]
+        + [q['owner_id'] for course_quizzes in quizzes.values() for q in course_quizzes]
+    )
+
+
+def _quiz_ids(quizzes):
+    return [row['id'] for course_quizzes in quizzes.values() for row in course_quizzes]
+
+
+def course_detail(rows, request):
+    course_ids = [row['id'] for row in rows]
+    materials = _group_by(_materials_query(course_ids), 'course_id')
+    quizzes = _group_by(_quizzes_query(course_ids), 'course_id')
+    questions = _build_questions(_questions_query(_quiz_ids(quizzes)))
+    users = load_users(_course_user_ids(rows, materials, quizzes))
+    return _course_detail(rows, materials, quizzes, questions, users, request)
+
+
+async def acourse_detail(rows, request):
+    course_ids = [row['id'] for row in rows]
+    materials = _group_by([row async for row in _materials_query(course_ids)], 'course_id')
+    quizzes = _group_by([row async for row in _quizzes_query(course_ids)], 'course_id')
+    questions = _build_questions([row async for row in _questions_query(_quiz_ids(quizzes))])
+    users = await aload_users(_course_user_ids(rows, materials, quizzes))
+    return _course_detail(rows, materials, quizzes, questions, users, request)
+
+
+def _course_detail(rows, materials, quizzes, questions, users, request):
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'teacher': users.get(row['teacher_id']),
+            'created_at': _datetime(row['created_at']),
+            'materials': [material(m, users, request) for m in materials.get(row['id'], [])],
+            'quizzes': [quiz(q, users, questions) for q in quizzes.get(row['id'], [])],
+        }
+        for row in rows
+    ]
+
+
+async def amaterial_list(rows, request):
+    users = await aload_users(row['owner_id'] for row in rows)
+    return [material(row, users, request) for row in rows]
+
+
+def submission_list(rows):
+    users = load_users(row['student_id'] for row in rows)
+    return [
+        {
+            'id': row['id'],
+            'quiz': row['quiz_id'],
+            'student': users.get(row['student_id']),
+            'submitted_at': _datetime(row['submitted_at']),
+            'answers': row['answers'],
+            'score': float(row['score']) if row['score'] is not None else None,
+        }
+        for row in rows
+    ]
+
+
+class FastReadMixin:
+    """list/retrieve de GET/HEAD servidos por `fast_represent` a partir de `.values()`.
+
+    As demais ações e métodos seguem pelo serializer normal. `fast_path =
+    False` (ou `as_view(fast_path=False)`) desliga o atalho.
+    """
+    fast_path = True
+
+    def get_fast_queryset(self):
+        raise NotImplementedError
+
+    def fast_represent(self, rows):
+        raise NotImplementedError
+
+    def use_fast_path(self):
+        return self.fast_path and self.request.method in SAFE_METHODS
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_path():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_fast_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.fast_represent(page))
+        return Response(self.fast_represent(list(queryset)))
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_fast_path():
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_fast_queryset())
+        row = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        return Response(self.fast_represent([row])[0])
@@ -0,0 +1,134 @@
+"""Exportação das notas de um curso (alunos × quizzes) em streaming.
+
+As submissões são lidas em ordem de aluno com `.iterator(chunk_size=...)`
+(cursor do lado do servidor no Postgres), então a memória usada não depende
+do tamanho do curso.
+"""
+import csv
+import io
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+
+from django.http import StreamingHttpResponse
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # dependência opcional
+    pa = pq = None
+
+from .models import Quiz, Submission
+
+CHUNK_SIZE = 2000
+CSV_BATCH_ROWS = 500
+PARQUET_ROW_GROUP_SIZE = 10000
+FORMATS = ('csv', 'parquet')
+
+
+def parquet_available():
+    return pq is not None
+
+
+def _column_names(quizzes):
+    titles = Counter(quiz.title for quiz in quizzes)
+    # Títulos repetidos ganham o id para que as colunas não se confundam
+    return [
+        f'{quiz.title} (#{quiz.pk})' if titles[quiz.title] > 1 else quiz.title
+        for quiz in quizzes
+    ]
+
+
+def _rows(course_id, quizzes):
+    """(id do aluno, username, notas na ordem de `quizzes`), um aluno por vez"""
+    columns = {quiz.pk: index for index, quiz in enumerate(quizzes)}
+    submissions = (
+        Submission.objects.filter(quiz__course_id=course_id)
+        .order_by('student_id', 'quiz_id')
+        .values_list('student_id', 'student__username', 'quiz_id', 'score')
+    )
+    for (student_id, username), group in groupby(submissions.iterator(chunk_size=CHUNK_SIZE), key=itemgetter(0, 1)):
+        scores = [None] * len(columns)
+        for _, _, quiz_id, score in group:
+            scores[columns[quiz_id]] = score
+        yield student_id, username, scores
+
+
+class _Echo:
+    """Pseudo-buffer: o csv.writer devolve a linha em vez de gravá-la"""
+    def write(self, value):
+        return value
+
+
+def _stream_csv(course_id, quizzes):
+    writer = csv.writer(_Echo())
+    batch = [writer.writerow(['student_id', 'username', *_column_names(quizzes)])]
+    for student_id, username, scores in _rows(course_id, quizzes):
+        batch.append(writer.writerow([student_id, username, *scores]))
+        if len(batch) >= CSV_BATCH_ROWS:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Destino do ParquetWriter que acumula os bytes até serem enviados"""
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _stream_parquet(course_id, quizzes):
+    names = _column_names(quizzes)
+    schema = pa.schema(
+        [('student_id', pa.int64()), ('username', pa.string())]
+        + [(name, pa.float64()) for name in names]
+    )
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    def row_group(rows):
+        columns = [[row[0] for row in rows], [row[1] for row in rows]]
+        columns += [[row[2][index] for row in rows] for index in range(len(names))]
+        writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+        return sink.drain()
+
+    rows = []
+    for row in _rows(course_id, quizzes):
+        rows.append(row)
+        if len(rows) >= PARQUET_ROW_GROUP_SIZE:
+            yield row_group(rows)
+            rows = []
+    if rows:
+        yield row_group(rows)
+    writer.close()
+    yield sink.drain()
+
+
+def gradebook_response(course, output='csv'):
+    """StreamingHttpResponse com as notas do curso em CSV ou Parquet"""
+    quizzes = list(Quiz.objects.filter(course=course).order_by('created_at', 'pk').only('pk', 'title'))
+    if output == 'parquet':
+        content, content_type = _stream_parquet(course.pk, quizzes), 'application/vnd.apache.parquet'
+    else:
+        content, content_type = _stream_csv(course.pk, quizzes), 'text/csv; charset=utf-8'
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="gradebook-course-{course.pk}.{output}"'
+    return response
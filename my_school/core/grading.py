@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .models import Question
+
+ANSWER_KEY_TIMEOUT = 60 * 60
+
+
+def _answer_key_cache_key(quiz_id, version):
+    return f'core:quiz:{quiz_id}:answer_key:{version}'
+
+
+def _versions(quiz_ids):
+    """Versão das questões de cada quiz (quantidade e último updated_at), numa query.
+
+    Faz parte da chave do cache: toda edição, inclusão ou remoção de questão
+    muda a chave em qualquer processo, sem depender de invalidação.
+    """
+    versions = {quiz_id: '0' for quiz_id in quiz_ids}
+    rows = (
+        Question.objects.filter(quiz_id__in=quiz_ids).order_by()
+        .values('quiz_id').annotate(count=Count('id'), last=Max('updated_at'))
+        .values_list('quiz_id', 'count', 'last')
+    )
+    for quiz_id, count, last in rows:
+        versions[quiz_id] = f'{count}.{last.timestamp()}'
+    return versions
+
+
+def get_answer_key(quiz_id):
+    """Gabarito do quiz no formato {"question_id": "correct_option"}"""
+    return get_answer_keys([quiz_id])[quiz_id]
+
+
+def get_answer_keys(quiz_ids):
+    """Gabaritos de vários quizzes: uma query de versões, um cache.get_many e uma query para os que faltam"""
+    versions = _versions(set(quiz_ids))
+    keys = {_answer_key_cache_key(quiz_id, version): quiz_id for quiz_id, version in versions.items()}
+    cached = cache.get_many(keys)
+    answer_keys = {keys[key]: answer_key for key, answer_key in cached.items()}
+    missing = [quiz_id for key, quiz_id in keys.items() if key not in cached]
+    if missing:
+        loaded = {quiz_id: {} for quiz_id in missing}
+        rows = Question.objects.filter(quiz_id__in=missing).values_list('quiz_id', 'id', 'correct_option')
+        for quiz_id, question_id, correct_option in rows:
+            loaded[quiz_id][str(question_id)] = correct_option
+        cache.set_many(
+            {_answer_key_cache_key(quiz_id, versions[quiz_id]): answer_key for quiz_id, answer_key in loaded.items()},
+            ANSWER_KEY_TIMEOUT,
+        )
+        answer_keys.update(loaded)
+    return answer_keys
+
+
+def grade_detail(answers, answer_key):
+    """Pontuação (0 a 100) e ids das questões acertadas, calculados em memória"""
+    # Submissões antigas podem ter answers fora do formato {"id": "opção"}
+    if not isinstance(answers, dict) or not answers or not answer_key:
+        return 0.0, []
+    correct = [
+        question_id for question_id, correct_option in answer_key.items()
+        if answers.get(question_id) == correct_option
+    ]
+    return (len(correct) / len(answer_key)) * 100, correct
+
+
+def grade(answers, answer_key):
+    """Calcula a pontuação (0 a 100) das respostas em memória"""
+    return grade_detail(answers, answer_key)[0]
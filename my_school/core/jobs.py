@@ -0,0 +1,54 @@
+"""Tarefas em segundo plano do core (ver core.tasks)"""
+import os
+
+from django.conf import settings
+
+from . import search
+from . import stats
+from .models import Material
+from .tasks import task
+
+TEXT_EXTENSIONS = {'.txt', '.md', '.csv', '.json', '.html', '.htm', '.xml', '.rst', '.tex', '.py'}
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # dependência opcional
+    PdfReader = None
+
+
+@task()
+def refresh_quiz_stats(quiz_id):
+    stats.refresh(quiz_id)
+
+
+def _extract_text(fieldfile):
+    ext = os.path.splitext(fieldfile.name)[1].lower()
+    limit = settings.MATERIAL_TEXT_MAX_BYTES
+    if ext in TEXT_EXTENSIONS:
+        with fieldfile.open('rb') as file:
+            return file.read(limit).decode('utf-8', errors='replace')
+    if ext == '.pdf' and PdfReader is not None:
+        with fieldfile.open('rb') as file:
+            text = []
+            size = 0
+            for page in PdfReader(file).pages:
+                page_text = page.extract_text() or ''
+                text.append(page_text)
+                size += len(page_text)
+                if size >= limit:
+                    break
+            return '\n'.join(text)[:limit]
+    return ''
+
+
+@task()
+def extract_material_text(material_id):
+    """Guarda o texto do arquivo do material (texto puro e, com pypdf, PDF) e o indexa na busca"""
+    material = Material.objects.filter(pk=material_id).first()
+    if material is None or not material.file:
+        return
+    text = _extract_text(material.file)
+    # update() não altera updated_at: o texto não aparece na API
+    Material.objects.filter(pk=material_id).update(extracted_text=text)
+    material.extracted_text = text
+    search.index_material(material)
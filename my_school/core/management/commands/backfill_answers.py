@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from core.answer_rows import build_rows
+from core.models import Answer, Submission
+
+
+class Command(BaseCommand):
+    help = 'Preenche a tabela de respostas normalizadas (core.Answer) a partir de Submission.answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='submissões por transação')
+        parser.add_argument('--quiz', type=int, help='processa apenas as submissões deste quiz')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='regrava também as submissões que já têm respostas normalizadas')
+
+    def handle(self, *args, **options):
+        if not settings.SUBMISSION_ANSWER_ROWS:
+            raise CommandError('SUBMISSION_ANSWER_ROWS está desativado')
+
+        submissions = Submission.objects.only('id', 'quiz_id', 'answers').order_by('pk')
+        if options['quiz']:
+            submissions = submissions.filter(quiz_id=options['quiz'])
+        if not options['rebuild']:
+            submissions = submissions.filter(~Exists(Answer.objects.filter(submission=OuterRef('pk'))))
+
+        last_pk = 0
+        total_submissions = total_rows = 0
+        while True:
+            # Paginação por pk: cada lote é uma query indexada
+            batch = list(submissions.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            rows = build_rows(batch)
+            with transaction.atomic():
+                if options['rebuild']:
+                    Answer.objects.filter(submission_id__in=[submission.pk for submission in batch]).delete()
+                Answer.objects.bulk_create(rows, batch_size=1000)
+            total_submissions += len(batch)
+            total_rows += len(rows)
+            self.stdout.write(f'{total_submissions} submissões, {total_rows} respostas')
+
+        self.stdout.write(self.style.SUCCESS(f'Concluído: {total_submissions} submissões, {total_rows} respostas gravadas'))
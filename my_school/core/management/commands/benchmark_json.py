@@ -0,0 +1,58 @@
+import io
+import timeit
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.renderers import ORJSONParser, ORJSONRenderer
+from core.views import CourseViewSet
+
+
+class Command(BaseCommand):
+    help = 'Compara JSONRenderer (stdlib) e ORJSONRenderer na listagem e no detalhe de cursos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=200, help='repetições por medição')
+        parser.add_argument('--page-size', type=int, default=200, help='cursos na listagem')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError('Nenhum superusuário encontrado')
+
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+        payloads = {}
+        for action, path, kwargs in [
+            ('list', f"/api/courses/?page_size={options['page_size']}", {}),
+            ('retrieve', '/api/courses/{pk}/', None),
+        ]:
+            if kwargs is None:
+                pk = CourseViewSet.queryset.order_by('pk').values_list('pk', flat=True).first()
+                if pk is None:
+                    continue
+                path, kwargs = path.format(pk=pk), {'pk': str(pk)}
+            request = factory.get(path)
+            force_authenticate(request, user=user)
+            response = CourseViewSet.as_view({'get': action})(request, **kwargs)
+            payloads[f'{action} {path}'] = response.data
+
+        stdlib, fast = JSONRenderer(), ORJSONRenderer()
+        stdlib_parser, fast_parser = JSONParser(), ORJSONParser()
+        number = options['number']
+        for name, data in payloads.items():
+            expected = stdlib.render(data)
+            if fast.render(data) != expected:
+                raise CommandError(f'{name}: saída do orjson difere do JSONRenderer')
+            stdlib_time = timeit.timeit(lambda: stdlib.render(data), number=number) / number
+            fast_time = timeit.timeit(lambda: fast.render(data), number=number) / number
+            parse_stdlib = timeit.timeit(lambda: stdlib_parser.parse(io.BytesIO(expected)), number=number) / number
+            parse_fast = timeit.timeit(lambda: fast_parser.parse(io.BytesIO(expected)), number=number) / number
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name} ({len(expected)} bytes)'))
+            self.stdout.write(f'  render: json {stdlib_time * 1000:.3f} ms, orjson {fast_time * 1000:.3f} ms '
+                              f'({stdlib_time / fast_time:.1f}x)')
+            self.stdout.write(f'  parse:  json {parse_stdlib * 1000:.3f} ms, orjson {parse_fast * 1000:.3f} ms '
+                              f'({parse_stdlib / parse_fast:.1f}x)')
+
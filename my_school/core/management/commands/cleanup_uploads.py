@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import uploads
+
+
+class Command(BaseCommand):
+    help = 'Apaga uploads de material abandonados e arquivos .part sem upload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=settings.MATERIAL_UPLOAD_EXPIRY,
+                            help='segundos sem partes novas para um upload ser considerado abandonado')
+
+    def handle(self, *args, **options):
+        removed_uploads, removed_files = uploads.cleanup(options['max_age'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{removed_uploads} uploads e {removed_files} arquivos órfãos removidos'
+        ))
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import Material
+from core.signals import material_file_referenced
+
+
+class Command(BaseCommand):
+    help = 'Apaga os arquivos de materiais que nenhum Material referencia (blobs do storage deduplicado)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=settings.MATERIAL_BLOB_GRACE,
+                            help='segundos desde o último reaproveitamento para um blob poder ser apagado')
+
+    def handle(self, *args, **options):
+        storage = Material.file.field.storage
+        directory = Material.file.field.upload_to
+        referenced = set(Material.objects.values_list('file', flat=True))
+        removed = 0
+        for name in storage.blobs(directory):
+            # collect confere de novo as referências depois de isolar o blob
+            if name not in referenced and storage.collect(name, material_file_referenced, options['grace']):
+                removed += 1
+        self.stdout.write(self.style.SUCCESS(f'{removed} arquivos removidos'))
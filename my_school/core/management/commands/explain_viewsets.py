@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.urls import router
+
+
+class Command(BaseCommand):
+    help = 'Executa list/retrieve de cada viewset e mostra o EXPLAIN das queries, apontando varreduras sequenciais'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='usuário das requisições (padrão: primeiro superusuário)')
+        parser.add_argument('--fail-on-seq-scan', action='store_true',
+                            help='termina com erro se alguma query fizer varredura sequencial')
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+        else:
+            user = User.objects.filter(is_superuser=True).first()
+        if user is None:
+            raise CommandError('Nenhum usuário encontrado; use --user')
+
+        # Garante que as respostas não venham do cache
+        caches['responses'].clear()
+        factory = APIRequestFactory(SERVER_NAME='localhost')
+
+        flagged = 0
+        for prefix, viewset, basename in router.registry:
+            queryset = getattr(viewset, 'queryset', None)
+            if queryset is None or not hasattr(viewset, 'list'):
+                continue
+            scenarios = [('list', f'/api/{prefix}/', {})]
+            first = queryset.model._default_manager.order_by('pk').first()
+            for field in getattr(viewset, 'filterset_fields', []):
+                if first is not None:
+                    value = getattr(first, f'{field}_id', getattr(first, field, ''))
+                    scenarios.append(('list', f'/api/{prefix}/?{field}={value}', {}))
+            if first is not None:
+                scenarios.append(('retrieve', f'/api/{prefix}/{first.pk}/', {'pk': str(first.pk)}))
+
+            for action, path, kwargs in scenarios:
+                request = factory.get(path)
+                force_authenticate(request, user=user)
+                view = viewset.as_view({'get': action})
+                with CaptureQueriesContext(connection) as ctx:
+                    response = view(request, **kwargs)
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{basename} {action} {path} -> {response.status_code}'))
+                for query in ctx.captured_queries:
+                    if not query['sql'].lstrip().upper().startswith('SELECT'):
+                        continue
+                    plan, seq_scans = self.explain(query['sql'])
+                    flagged += seq_scans
+                    self.stdout.write(f"  {query['sql'][:160]}")
+                    for line in plan:
+                        style = self.style.WARNING if self.is_seq_scan(line) else str
+                        self.stdout.write(style(f'    {line}'))
+
+        summary = f'{flagged} varredura(s) sequencial(is) encontrada(s)'
+        if flagged and options['fail_on_seq_scan']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.WARNING(summary) if flagged else self.style.SUCCESS(summary))
+
+    def explain(self, sql):
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            rows = cursor.fetchall()
+        plan = [row[-1] for row in rows]
+        return plan, sum(1 for line in plan if self.is_seq_scan(line))
+
+    def is_seq_scan(self, line):
+        if connection.vendor == 'sqlite':
+            # "SCAN tabela" sem índice; "SCAN tabela USING INDEX" percorre o índice
+            return line.startswith('SCAN ') and ' USING ' not in line
+        return 'Seq Scan' in line
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = 'Regrava o índice de busca (core.SearchDocument) a partir de cursos, materiais e questões'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='documentos por INSERT')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = search.rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Concluído: {total} documentos indexados'))
@@ -0,0 +1,62 @@
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import tasks
+
+
+class Command(BaseCommand):
+    help = 'Executa as tarefas da fila (core.Task) em um pool de threads ou processos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='tarefas executadas ao mesmo tempo')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='process para tarefas que usam muita CPU')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='segundos de espera com a fila vazia')
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help='segundos até uma tarefa em execução ser considerada abandonada')
+        parser.add_argument('--once', action='store_true', help='esvazia a fila e termina')
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        if options['pool'] == 'process':
+            # spawn: cada processo abre as próprias conexões com o banco
+            executor = ProcessPoolExecutor(concurrency, mp_context=multiprocessing.get_context('spawn'),
+                                           initializer=django.setup)
+        else:
+            executor = ThreadPoolExecutor(concurrency)
+
+        done = failed = 0
+        running = set()
+        last_stale_check = 0
+        try:
+            with executor:
+                while True:
+                    if time.monotonic() - last_stale_check > options['stale_after']:
+                        tasks.release_stale(options['stale_after'])
+                        last_stale_check = time.monotonic()
+                    free = concurrency - len(running)
+                    claimed = tasks.claim(worker, free) if free else []
+                    close_old_connections()
+                    running.update(executor.submit(tasks.run, task_id) for task_id in claimed)
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+                    finished, running = wait(running, timeout=options['poll_interval'], return_when='FIRST_COMPLETED')
+                    for future in finished:
+                        if future.result():
+                            done += 1
+                        else:
+                            failed += 1
+        except KeyboardInterrupt:
+            self.stdout.write('Interrompido; tarefas em execução voltam à fila após --stale-after')
+        self.stdout.write(self.style.SUCCESS(f'{done} tarefas concluídas, {failed} com falha'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:07
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_materialupload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='material',
+            name='file',
+            field=models.FileField(storage=core.storage.material_storage, upload_to='materials/'),
+        ),
+    ]
@@ -1,11 +1,17 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User, Group
 from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .storage import material_storage
 
 
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     is_teacher = models.BooleanField(default=False)
+    token_version = models.PositiveIntegerField(default=0)  # Incrementado quando os papéis mudam
 
     def __str__(self):
         return f"{self.user.username} - {'Professor' if self.is_teacher else 'Aluno'}"
@@ -20,19 +26,26 @@ class Course(models.Model):
         limit_choices_to={'groups__name': 'professor'}
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['teacher', '-created_at'], name='course_teacher_created_idx'),
+            models.Index(fields=['-created_at'], name='course_created_idx'),
+        ]
 
 
 class Material(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
-    file = models.FileField(upload_to='materials/')
+    file = models.FileField(upload_to='materials/', storage=material_storage)
+    extracted_text = models.TextField(blank=True, default='')  # Preenchido em segundo plano
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='materials')
     owner = models.ForeignKey(
         User,
@@ -45,6 +58,37 @@ class Material(models.Model):
 
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['course', '-uploaded_at'], name='material_course_uploaded_idx'),
+            models.Index(fields=['-uploaded_at'], name='material_uploaded_idx'),
+        ]
+
+
+class MaterialUpload(models.Model):
+    """Envio de material em partes; o Material só é criado ao concluir"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    received_bytes = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_size})"
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+    @property
+    def received_chunks(self):
+        if self.received_bytes == self.total_size:
+            return self.total_chunks
+        return self.received_bytes // self.chunk_size
 
 
 class Quiz(models.Model):
@@ -57,6 +101,7 @@ class Quiz(models.Model):
         limit_choices_to={'groups__name': 'professor'}
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.title
@@ -64,6 +109,9 @@ class Quiz(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Quizzes'
+        indexes = [
+            models.Index(fields=['-created_at'], name='quiz_created_idx'),
+        ]
 
 
 class Question(models.Model):
@@ -81,6 +129,7 @@ class Question(models.Model):
     option_c = models.CharField(max_length=200)
     option_d = models.CharField(max_length=200)
     correct_option = models.CharField(max_length=1, choices=OPTION_CHOICES)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.quiz.title} - {self.text[:50]}..."
@@ -100,6 +149,8 @@ class Submission(models.Model):
     submitted_at = models.DateTimeField(auto_now_add=True)
     answers = models.JSONField()  # Formato: {"question_id": "selected_option"}
     score = models.FloatField(null=True, blank=True)
+    stats_applied = models.BooleanField(default=False)  # Já somada em QuizStats
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.student.username} - {self.quiz.title}"
@@ -107,24 +158,131 @@ class Submission(models.Model):
     class Meta:
         ordering = ['-submitted_at']
         unique_together = ['quiz', 'student']  # Um aluno só pode submeter uma vez por quiz
+        # (quiz, student) já é coberto pelo índice único acima
+        indexes = [
+            models.Index(fields=['student', '-submitted_at'], name='submission_student_sub_idx'),
+            models.Index(fields=['-submitted_at'], name='submission_submitted_idx'),
+            models.Index(fields=['quiz'], condition=models.Q(stats_applied=False), name='submission_stats_pending_idx'),
+        ]
 
     def calculate_score(self):
-        """Calcula a pontuação baseada nas respostas corretas"""
-        if not self.answers:
-            return 0.0
-        
-        total_questions = self.quiz.questions.count()
-        if total_questions == 0:
-            return 0.0
-        
-        correct_answers = 0
-        for question in self.quiz.questions.all():
-            question_id = str(question.id)
-            if question_id in self.answers:
-                if self.answers[question_id] == question.correct_option:
-                    correct_answers += 1
-        
-        score = (correct_answers / total_questions) * 100
-        self.score = score
-        self.save()
-        return score 
\ No newline at end of file
+        """Calcula a pontuação baseada nas respostas corretas (sem salvar)"""
+        from .grading import get_answer_key, grade
+        self.score = grade(self.answers, get_answer_key(self.quiz_id))
+        return self.score
+
+
+class Answer(models.Model):
+    """Resposta de uma questão em uma submissão, normalizada a partir de Submission.answers"""
+    OPTION_CHOICES = [
+        (1, 'A'),
+        (2, 'B'),
+        (3, 'C'),
+        (4, 'D'),
+    ]
+
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='answer_items')
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answer_items')
+    option = models.PositiveSmallIntegerField(choices=OPTION_CHOICES)
+
+    def __str__(self):
+        return f"{self.submission_id} - {self.question_id}: {self.get_option_display()}"
+
+    class Meta:
+        unique_together = ['submission', 'question']
+        indexes = [
+            models.Index(fields=['question', 'option'], name='answer_question_option_idx'),
+        ]
+
+
+class QuizStats(models.Model):
+    """Agregados de um quiz, atualizados a cada submissão corrigida"""
+    HISTOGRAM_BINS = 10  # faixas de 10 pontos; 100 entra na última
+
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    score_sum_sq = models.FloatField(default=0.0)
+    score_min = models.FloatField(null=True, blank=True)
+    score_max = models.FloatField(null=True, blank=True)
+    histogram = models.JSONField(default=list)  # Formato: [n_0_10, n_10_20, ..., n_90_100]
+    question_correct = models.JSONField(default=dict)  # Formato: {"question_id": acertos}
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Estatísticas - {self.quiz_id}"
+
+    class Meta:
+        verbose_name_plural = 'Quiz stats'
+
+    @property
+    def mean(self):
+        return self.score_sum / self.count if self.count else None
+
+    @property
+    def variance(self):
+        if not self.count:
+            return None
+        mean = self.score_sum / self.count
+        return max(self.score_sum_sq / self.count - mean * mean, 0.0)
+
+
+class Task(models.Model):
+    """Tarefa em segundo plano (core.tasks), executada pelo comando run_tasks"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pendente'),
+        (RUNNING, 'Executando'),
+        (FAILED, 'Falhou'),
+    ]
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list)
+    key = models.CharField(max_length=200, blank=True, db_index=True)  # Evita tarefas repetidas na fila
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='task_status_run_at_idx'),
+        ]
+
+
+class SearchDocument(models.Model):
+    """Texto indexado de um curso, material ou questão (core.search).
+
+    O índice invertido fica fora do ORM: uma tabela FTS5 mantida por
+    triggers no SQLite e uma coluna tsvector gerada no Postgres.
+    """
+    COURSE = 'course'
+    MATERIAL = 'material'
+    QUESTION = 'question'
+    KIND_CHOICES = [
+        (COURSE, 'Curso'),
+        (MATERIAL, 'Material'),
+        (QUESTION, 'Questão'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    course_id = models.PositiveBigIntegerField(db_index=True)
+    quiz_id = models.PositiveBigIntegerField(null=True, blank=True)  # Apenas para questões
+    title = models.CharField(max_length=500)
+    body = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title[:50]}"
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
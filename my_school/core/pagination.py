@@ -0,0 +1,17 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CoreCursorPagination(CursorPagination):
+    """Paginação por cursor (keyset) usando o `ordering` de cada viewset.
+
+    Evita OFFSET e COUNT(*): o custo de cada página não cresce com a tabela.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'ordering', None) or queryset.model._meta.ordering or ['-pk']
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return tuple(ordering)
@@ -0,0 +1,73 @@
+from functools import lru_cache
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+@lru_cache(maxsize=None)
+def build_plan(serializer_class):
+    """Percorre a árvore do serializer e devolve (select_related, prefetch_related, only).
+
+    Relações to-one aninhadas viram select_related; relações many viram
+    Prefetch com o plano do serializer filho aplicado recursivamente.
+    """
+    return plan_for(serializer_class())
+
+
+def _pk_only_plan(model, source):
+    """Plano de uma relação many exibida só como lista de pks"""
+    relation = model._meta.get_field(source)
+    only = ['pk']
+    if relation.one_to_many:
+        # O prefetch agrupa pela FK; sem ela cada objeto faria uma query
+        only.append(relation.field.attname)
+    return (), (), tuple(only)
+
+
+def plan_for(serializer):
+    """Plano de uma instância de serializer (que pode ter campos removidos)"""
+    select, prefetch = [], []
+    for field in serializer.fields.values():
+        if field.source == '*':
+            continue
+        if isinstance(field, serializers.ManyRelatedField):
+            model = serializer.Meta.model._meta.get_field(field.source).related_model
+            prefetch.append((field.source, model, _pk_only_plan(serializer.Meta.model, field.source)))
+        elif isinstance(field, serializers.ListSerializer):
+            child = field.child
+            if isinstance(child, serializers.ModelSerializer):
+                prefetch.append((field.source, child.Meta.model, plan_for(child)))
+        elif isinstance(field, serializers.ModelSerializer):
+            child_select, child_prefetch, _ = plan_for(field)
+            select.append(field.source)
+            select.extend(f'{field.source}__{path}' for path in child_select)
+            prefetch.extend(
+                (f'{field.source}__{path}', model, plan)
+                for path, model, plan in child_prefetch
+            )
+    return tuple(select), tuple(prefetch), ()
+
+
+def _apply(queryset, plan):
+    select, prefetch, only = plan
+    if only:
+        queryset = queryset.only(*only)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*(
+            Prefetch(path, queryset=_apply(model._default_manager.all(), child_plan))
+            for path, model, child_plan in prefetch
+        ))
+    return queryset
+
+
+def optimize_queryset(queryset, serializer_class, serializer=None):
+    """Aplica ao queryset o plano de carregamento do serializer_class.
+
+    O número de queries fica fixo, independente da quantidade de linhas.
+    Com `serializer` (instância já podada, ver core.sparse) o plano é
+    calculado para ela, sem cache.
+    """
+    plan = plan_for(serializer) if serializer is not None else build_plan(serializer_class)
+    return _apply(queryset, plan)
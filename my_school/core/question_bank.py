@@ -0,0 +1,64 @@
+"""Criação de questões em lote: quiz com questões aninhadas e importação de bancos.
+
+As questões entram com um único bulk_create, que não dispara os signals de
+post_save; `create_questions` faz o mesmo que eles fariam (cache de
+respostas e índice de busca) uma vez para o lote.
+"""
+import csv
+import io
+import json
+import os
+
+from .models import Question
+from .response_cache import bump
+from . import search
+
+MAX_QUESTIONS = 1000
+CSV_COLUMNS = ['text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_option']
+
+
+class QuestionFileError(ValueError):
+    """Arquivo de questões ilegível (formato, codificação ou colunas)"""
+
+
+def create_questions(quiz, items):
+    """Grava as questões validadas do quiz; deve rodar dentro de uma transação"""
+    questions = Question.objects.bulk_create(
+        [Question(quiz=quiz, **item) for item in items], batch_size=500,
+    )
+    search.index_questions(questions, quiz.course_id)
+    bump(f'course:{quiz.course_id}', f'quiz:{quiz.pk}')
+    return questions
+
+
+def _read_csv(content):
+    reader = csv.DictReader(io.StringIO(content))
+    missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise QuestionFileError(f"colunas ausentes no CSV: {', '.join(missing)}")
+    # Colunas extras são ignoradas; células vazias viram strings vazias
+    return [{column: (row[column] or '').strip() for column in CSV_COLUMNS} for row in reader]
+
+
+def _read_json(content):
+    try:
+        items = json.loads(content)
+    except ValueError as exc:
+        raise QuestionFileError(f'JSON inválido: {exc}')
+    if isinstance(items, dict):
+        items = items.get('questions')
+    if not isinstance(items, list):
+        raise QuestionFileError('o JSON deve ser uma lista de questões (ou {"questions": [...]})')
+    return items
+
+
+def read_file(upload):
+    """Lista de questões (dicts ainda não validados) de um arquivo .csv ou .json"""
+    ext = os.path.splitext(upload.name)[1].lower()
+    if ext not in ('.csv', '.json'):
+        raise QuestionFileError('formato não suportado; envie um arquivo .csv ou .json')
+    try:
+        content = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise QuestionFileError('o arquivo deve estar em UTF-8')
+    return _read_csv(content) if ext == '.csv' else _read_json(content)
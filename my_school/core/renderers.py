@@ -0,0 +1,42 @@
+"""Renderer e parser JSON baseados em orjson (opcionais, ver API_FAST_JSON).
+
+A saída é a mesma do JSONRenderer do DRF: compacta, UTF-8, datas no
+formato ECMA 262 (com "Z") e Decimal/UUID/lazy strings tratados pelo
+encoder do DRF.
+"""
+import codecs
+
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser, get_encoding
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Tipos que o orjson formataria diferente do DRF passam pelo encoder do DRF
+OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            # Saída indentada (API navegável): mantém o json da stdlib
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=_default, option=OPTIONS)
+        # Como o DRF, escapa \u2028 e \u2029 para manter um subconjunto válido de JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if codecs.lookup(get_encoding(parser_context or {})).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,109 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA_ALIAS = 'replica'
+STICKY_COOKIE = 'read_primary'
+STICKY_SALT = 'core.replicas.sticky'
+
+# Alias usado para leituras na requisição atual (None = primário)
+_read_alias = ContextVar('core_read_alias', default=None)
+
+
+def current_read_alias():
+    return _read_alias.get()
+
+
+def _sticky_cache_key(user_id):
+    return f'core:user:{user_id}:read_primary'
+
+
+def pin_to_primary(user_id, response=None):
+    """Faz as próximas leituras do usuário irem ao primário (read-your-writes).
+
+    Grava no cache compartilhado (core.checks garante que não é por processo)
+    e, com `response`, também num cookie assinado, que vale mesmo se a
+    entrada do cache for descartada antes do prazo.
+    """
+    cache.set(_sticky_cache_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+    if response is not None:
+        response.set_signed_cookie(
+            STICKY_COOKIE, str(user_id), salt=STICKY_SALT, max_age=settings.REPLICA_STICKY_SECONDS,
+            httponly=True, samesite='Lax',
+        )
+
+
+def is_pinned(user_id, request=None):
+    if request is not None:
+        cookie = request.get_signed_cookie(
+            STICKY_COOKIE, default=None, salt=STICKY_SALT, max_age=settings.REPLICA_STICKY_SECONDS,
+        )
+        if cookie == str(user_id):
+            return True
+    return bool(cache.get(_sticky_cache_key(user_id)))
+
+
+def reads_from_replica(request):
+    """A requisição pode ler da réplica: ela existe, o método é seguro e o usuário não está preso"""
+    return (
+        REPLICA_ALIAS in connections
+        and request.method in SAFE_METHODS
+        and not (request.user.is_authenticated and is_pinned(request.user.pk, request))
+    )
+
+
+def use_replica():
+    """Marca as leituras do contexto atual para a réplica; devolve o token para reset"""
+    return _read_alias.set(REPLICA_ALIAS)
+
+
+def release_replica(token):
+    _read_alias.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """Leituras marcadas pelo ReplicaReadMixin vão à réplica; o resto, ao primário"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primário e réplica têm os mesmos dados
+        return True
+
+
+class ReplicaReadMixin:
+    """Envia as queries de métodos seguros à réplica, quando configurada.
+
+    Depois de uma escrita bem-sucedida o usuário fica preso ao primário por
+    REPLICA_STICKY_SECONDS (cache compartilhado e cookie assinado), para
+    enxergar o que acabou de gravar mesmo com atraso de replicação.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if reads_from_replica(request):
+            self._read_alias_token = use_replica()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user.pk, response)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        self._read_alias_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._read_alias_token is not None:
+                release_replica(self._read_alias_token)
@@ -0,0 +1,95 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from rest_framework.response import Response
+
+from .replicas import current_read_alias
+
+CACHE_ALIAS = 'responses'
+# Usuários (com grupos) aparecem embutidos em cursos, materiais e quizzes
+USERS_SCOPE = 'users'
+
+
+def _generation_key(scope):
+    return f'core:gen:{scope}'
+
+
+def _new_generation():
+    # Valor sempre novo: se a chave de geração for despejada pelo LRU, as
+    # respostas antigas nunca voltam a ser encontradas
+    return time.time_ns()
+
+
+def get_generations(scopes):
+    cache = caches[CACHE_ALIAS]
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: _new_generation() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def bump(*scopes):
+    """Invalida as respostas em cache que dependem de algum dos escopos, após o commit.
+
+    Antes do commit um leitor concorrente ainda vê as linhas antigas e as
+    gravaria sob a geração nova; fora de uma transação a troca é imediata.
+    """
+    transaction.on_commit(
+        lambda: caches[CACHE_ALIAS].set_many({_generation_key(scope): _new_generation() for scope in scopes}, None)
+    )
+
+
+class CachedResponseMixin:
+    """Cache no servidor dos dados serializados de list/retrieve.
+
+    A chave combina as gerações dos escopos do grafo de objetos (ver
+    `get_cache_scopes`), o caminho com a query string e `get_cache_variant`;
+    os sinais em `core.signals` trocam as gerações quando algo muda. O dado
+    é guardado antes da renderização, então JSON e API navegável compartilham
+    a mesma entrada.
+    """
+    cache_actions = ('list', 'retrieve')
+
+    def get_cache_scopes(self):
+        raise NotImplementedError
+
+    def get_cache_variant(self):
+        # Sobrescrever se a resposta passar a depender do usuário
+        return ''
+
+    def _cache_key(self, request):
+        generations = get_generations(self.get_cache_scopes())
+        generation = '.'.join(str(value) for value in generations)
+        alias = current_read_alias() or 'default'
+        # URLs de arquivos saem absolutas (esquema e host da requisição)
+        origin = request.build_absolute_uri('/')
+        return (f'core:resp:{type(self).__name__}:{self.action}:{generation}:{alias}:{self.get_cache_variant()}:'
+                f'{origin}:{request.get_full_path()}')
+
+    def _cached(self, handler, request, *args, **kwargs):
+        if self.action not in self.cache_actions:
+            return handler(request, *args, **kwargs)
+        cache = caches[CACHE_ALIAS]
+        key = self._cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            # Dados lidos da réplica podem estar atrasados em relação à geração
+            # atual; ficam pouco tempo para não mascarar a replicação
+            timeout = settings.REPLICA_STICKY_SECONDS if current_read_alias() else DEFAULT_TIMEOUT
+            cache.set(key, response.data, timeout)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(super().retrieve, request, *args, **kwargs)
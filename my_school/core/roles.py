@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.db import transaction
+
+ROLES_TIMEOUT = 60 * 15
+
+
+def _roles_cache_key(user_id):
+    return f'core:user:{user_id}:roles'
+
+
+def get_roles(user):
+    """Nomes dos grupos do usuário.
+
+    Memoizado no próprio objeto (vale para a requisição) e no cache por id
+    de usuário (vale entre requisições até ser invalidado).
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+    roles = getattr(user, '_core_roles', None)
+    if roles is None:
+        key = _roles_cache_key(user.pk)
+        roles = cache.get(key)
+        if roles is None:
+            roles = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(key, roles, ROLES_TIMEOUT)
+        user._core_roles = roles
+    return roles
+
+
+def has_role(user, role):
+    return role in get_roles(user)
+
+
+def invalidate_roles(*user_ids):
+    """Descarta os papéis em cache agora e de novo após o commit.
+
+    Uma leitura concorrente ainda vê os grupos antigos até o commit e pode
+    regravá-los no cache; a segunda remoção descarta essa cópia. O cache
+    'default' é compartilhado entre os processos (ver core.checks).
+    """
+    keys = [_roles_cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
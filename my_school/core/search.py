@@ -0,0 +1,227 @@
+"""Busca textual em cursos, materiais e questões.
+
+Cada objeto tem uma linha em SearchDocument, atualizada pelos signals
+(core.signals). A consulta usa o índice invertido do banco: FTS5 com bm25
+no SQLite e tsvector/ts_rank_cd no Postgres (ver migração 0010). Em outros
+bancos, ou num SQLite sem FTS5, cai para LIKE, sem ordenação por relevância.
+"""
+import html
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+
+from .models import Course, Material, Question, Quiz, SearchDocument
+
+POSTGRES_CONFIG = 'portuguese'
+SNIPPET_WORDS = 16
+# Marcadores de destaque trocados por <mark> depois de escapar o texto
+_START, _STOP = '\x02', '\x03'
+
+_TOKEN = re.compile(r'\w+')
+
+SQLITE_FTS_TABLE = 'core_searchdocument_fts'
+# Por alias: a tabela FTS5 existe? (só muda com uma migração, que reinicia os processos)
+_sqlite_fts = {}
+
+
+def _document(kind, obj, course_id, title, body, quiz_id=None):
+    return {
+        'kind': kind, 'object_id': obj.pk, 'course_id': course_id, 'quiz_id': quiz_id,
+        'title': title[:500], 'body': body,
+    }
+
+
+def course_document(course):
+    return _document(SearchDocument.COURSE, course, course.pk, course.name, course.description)
+
+
+def material_document(material):
+    body = '\n'.join(part for part in (material.description, material.extracted_text) if part)
+    return _document(SearchDocument.MATERIAL, material, material.course_id, material.title, body)
+
+
+def question_document(question, course_id):
+    body = '\n'.join([question.option_a, question.option_b, question.option_c, question.option_d])
+    return _document(SearchDocument.QUESTION, question, course_id, question.text, body, quiz_id=question.quiz_id)
+
+
+def index(document):
+    SearchDocument.objects.update_or_create(
+        kind=document['kind'], object_id=document['object_id'], defaults=document,
+    )
+
+
+def index_course(course):
+    index(course_document(course))
+
+
+def index_material(material):
+    index(material_document(material))
+
+
+def question_course_id(question):
+    """Curso da questão, sem query se o quiz já está carregado na instância"""
+    if Question.quiz.is_cached(question):
+        return question.quiz.course_id
+    return Quiz.objects.filter(pk=question.quiz_id).values_list('course_id', flat=True).first()
+
+
+def index_question(question):
+    course_id = question_course_id(question)
+    if course_id is not None:
+        index(question_document(question, course_id))
+
+
+def index_questions(questions, course_id):
+    """Indexa várias questões do mesmo curso (ex.: depois de um bulk_create)"""
+    SearchDocument.objects.bulk_create(
+        [SearchDocument(**question_document(question, course_id)) for question in questions],
+        batch_size=500,
+    )
+
+
+def quiz_moved(quiz):
+    # As questões seguem o curso do quiz
+    SearchDocument.objects.filter(kind=SearchDocument.QUESTION, quiz_id=quiz.pk).update(course_id=quiz.course_id)
+
+
+def remove(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def rebuild(batch_size=1000):
+    """Regrava o índice inteiro a partir das tabelas; devolve o total de documentos"""
+    SearchDocument.objects.all().delete()
+    total = 0
+    quiz_courses = dict(Quiz.objects.values_list('pk', 'course_id'))
+    sources = [
+        (Course.objects.order_by('pk'), course_document),
+        (Material.objects.order_by('pk'), material_document),
+        (Question.objects.order_by('pk'), lambda question: question_document(question, quiz_courses[question.quiz_id])),
+    ]
+    for queryset, build in sources:
+        batch = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            batch.append(SearchDocument(**build(obj)))
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+        total += len(batch)
+    return total
+
+
+def tokens(query):
+    return _TOKEN.findall(query)
+
+
+def _highlight(text):
+    return html.escape(text or '').replace(_START, '<mark>').replace(_STOP, '</mark>')
+
+
+def _filters(kinds, course_id, column=''):
+    sql, params = [], []
+    if kinds:
+        sql.append(f"{column}kind IN ({', '.join(['%s'] * len(kinds))})")
+        params += kinds
+    if course_id is not None:
+        sql.append(f'{column}course_id = %s')
+        params.append(course_id)
+    return ''.join(f' AND {clause}' for clause in sql), params
+
+
+def _search_sqlite(cursor, terms, kinds, course_id, limit, offset):
+    # Cada termo entre aspas (sem sintaxe FTS5 vinda do usuário); o último
+    # também casa como prefixo, para busca enquanto se digita
+    match = ' '.join(f'"{term}"' for term in terms) + '*'
+    where, params = _filters(kinds, course_id, 'd.')
+    cursor.execute(
+        f"""
+        SELECT d.kind, d.object_id, d.course_id, d.quiz_id, d.title,
+               snippet(core_searchdocument_fts, 1, %s, %s, '…', %s),
+               bm25(core_searchdocument_fts, 10.0, 1.0) AS rank
+        FROM core_searchdocument_fts
+        JOIN core_searchdocument d ON d.id = core_searchdocument_fts.rowid
+        WHERE core_searchdocument_fts MATCH %s{where}
+        ORDER BY rank
+        LIMIT %s OFFSET %s
+        """,
+        [_START, _STOP, SNIPPET_WORDS, match, *params, limit, offset],
+    )
+    # bm25 é menor quanto mais relevante
+    return [(*row[:6], -row[6]) for row in cursor.fetchall()]
+
+
+def _search_postgres(cursor, terms, kinds, course_id, limit, offset):
+    where, params = _filters(kinds, course_id)
+    # ts_headline é caro: calculado só para a página já ordenada
+    cursor.execute(
+        f"""
+        SELECT page.kind, page.object_id, page.course_id, page.quiz_id, page.title,
+               ts_headline(%s::regconfig, page.body, page.query, %s), page.rank
+        FROM (
+            SELECT id, kind, object_id, course_id, quiz_id, title, body, query,
+                   ts_rank_cd(search_vector, query) AS rank
+            FROM core_searchdocument, plainto_tsquery(%s::regconfig, %s) query
+            WHERE search_vector @@ query{where}
+            ORDER BY rank DESC, id
+            LIMIT %s OFFSET %s
+        ) page
+        ORDER BY page.rank DESC, page.id
+        """,
+        [
+            POSTGRES_CONFIG, f'StartSel={_START}, StopSel={_STOP}, MaxWords={SNIPPET_WORDS}, MinWords=5',
+            POSTGRES_CONFIG, ' '.join(terms), *params, limit, offset,
+        ],
+    )
+    return cursor.fetchall()
+
+
+def _search_like(terms, kinds, course_id, limit, offset):
+    documents = SearchDocument.objects.order_by('pk')
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+    if course_id is not None:
+        documents = documents.filter(course_id=course_id)
+    rows = documents.values_list('kind', 'object_id', 'course_id', 'quiz_id', 'title', 'body')[offset:offset + limit]
+    return [(*row[:5], row[5][:200], 0.0) for row in rows]
+
+
+def sqlite_fts_available(connection):
+    """A migração 0010 não cria a tabela FTS5 se o SQLite foi compilado sem ela"""
+    if connection.alias not in _sqlite_fts:
+        with connection.cursor() as cursor:
+            _sqlite_fts[connection.alias] = SQLITE_FTS_TABLE in connection.introspection.table_names(cursor)
+    return _sqlite_fts[connection.alias]
+
+
+def search(query, kinds=None, course_id=None, limit=20, offset=0):
+    """Documentos que contêm todos os termos de `query`, dos mais relevantes aos menos"""
+    terms = tokens(query)
+    if not terms:
+        return []
+    connection = connections[router.db_for_read(SearchDocument) or 'default']
+    if connection.vendor == 'sqlite' and sqlite_fts_available(connection):
+        with connection.cursor() as cursor:
+            rows = _search_sqlite(cursor, terms, kinds, course_id, limit, offset)
+    elif connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            rows = _search_postgres(cursor, terms, kinds, course_id, limit, offset)
+    else:
+        rows = _search_like(terms, kinds, course_id, limit, offset)
+    return [
+        {
+            'type': kind,
+            'id': object_id,
+            'course': course,
+            'quiz': quiz,
+            'title': title,
+            'snippet': _highlight(snippet),
+            'rank': round(rank, 4),
+        }
+        for kind, object_id, course, quiz, title, snippet, rank in rows
+    ]
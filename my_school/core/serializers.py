@@ -1,6 +1,11 @@
+import os
+
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
 from django.contrib.auth.models import User, Group
-from .models import Profile, Course, Material, Quiz, Question, Submission
+from . import question_bank
+from .models import Profile, Course, Material, MaterialUpload, Quiz, QuizStats, Question, Submission
 
 
 class GroupSerializer(serializers.ModelSerializer):
@@ -25,20 +30,76 @@ class MaterialSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'file', 'uploaded_at', 'course', 'owner']
 
 
+class MaterialUploadSerializer(serializers.ModelSerializer):
+    total_chunks = serializers.ReadOnlyField()
+    received_chunks = serializers.ReadOnlyField()
+
+    class Meta:
+        model = MaterialUpload
+        fields = ['id', 'course', 'title', 'description', 'filename', 'total_size', 'chunk_size',
+                  'received_bytes', 'total_chunks', 'received_chunks', 'created_at']
+        read_only_fields = ['chunk_size', 'received_bytes']
+
+    def validate_total_size(self, value):
+        if value <= 0 or value > settings.MATERIAL_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f'tamanho deve estar entre 1 e {settings.MATERIAL_UPLOAD_MAX_SIZE} bytes')
+        return value
+
+    def validate_filename(self, value):
+        return os.path.basename(value)
+
+
 class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
         fields = ['id', 'quiz', 'text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_option']
 
 
+class QuizQuestionSerializer(QuestionSerializer):
+    """Questão dentro de um quiz conhecido: `quiz` vem da URL ou do quiz pai"""
+    class Meta(QuestionSerializer.Meta):
+        read_only_fields = ['quiz']
+
+
 class QuizSerializer(serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
-    questions = QuestionSerializer(many=True, read_only=True)
+    questions = QuizQuestionSerializer(many=True, required=False)
     
     class Meta:
         model = Quiz
         fields = ['id', 'title', 'description', 'course', 'owner', 'created_at', 'questions']
 
+    def validate_questions(self, value):
+        if len(value) > question_bank.MAX_QUESTIONS:
+            raise serializers.ValidationError(f'máximo de {question_bank.MAX_QUESTIONS} questões por quiz')
+        return value
+
+    def create(self, validated_data):
+        # Quiz e questões na mesma transação; as questões num único INSERT
+        questions = validated_data.pop('questions', [])
+        with transaction.atomic():
+            quiz = super().create(validated_data)
+            question_bank.create_questions(quiz, questions)
+        return quiz
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.instance is not None:
+            # Na edição as questões são ignoradas (um GET seguido de PUT passa);
+            # elas mudam em quizzes/{quiz_pk}/questions/ ou questions/import/
+            fields['questions'].read_only = True
+        return fields
+
+
+class QuizSummarySerializer(serializers.ModelSerializer):
+    """Representação de listagem: sem as questões aninhadas"""
+    owner = UserSerializer(read_only=True)
+    questions_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Quiz
+        fields = ['id', 'title', 'description', 'course', 'owner', 'created_at', 'questions_count']
+
 
 class CourseSerializer(serializers.ModelSerializer):
     teacher = UserSerializer(read_only=True)
@@ -50,10 +111,49 @@ class CourseSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'teacher', 'created_at', 'materials', 'quizzes']
 
 
+class CourseSummarySerializer(serializers.ModelSerializer):
+    """Representação de listagem: sem materiais e quizzes aninhados"""
+    teacher = UserSerializer(read_only=True)
+    materials_count = serializers.IntegerField(read_only=True)
+    quizzes_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Course
+        fields = ['id', 'name', 'description', 'teacher', 'created_at', 'materials_count', 'quizzes_count']
+
+
 class SubmissionSerializer(serializers.ModelSerializer):
     student = UserSerializer(read_only=True)
     
     class Meta:
         model = Submission
         fields = ['id', 'quiz', 'student', 'submitted_at', 'answers', 'score']
-        read_only_fields = ['score'] 
\ No newline at end of file
+        read_only_fields = ['score'] 
+
+    def validate_answers(self, value):
+        # Formato: {"question_id": "opção"}
+        if not isinstance(value, dict) or not all(
+            isinstance(key, str) and isinstance(option, str) for key, option in value.items()
+        ):
+            raise serializers.ValidationError('answers deve ser um objeto {"id da questão": "opção"}')
+        return value
+
+
+class SubmissionBulkItemSerializer(serializers.Serializer):
+    """Item do envio em lote; `student` só é aceito para admins"""
+    quiz = serializers.IntegerField()
+    answers = serializers.DictField(child=serializers.CharField(max_length=1))
+    student = serializers.IntegerField(required=False)
+
+
+class QuizStatsSerializer(serializers.ModelSerializer):
+    mean = serializers.FloatField(read_only=True)
+    stddev = serializers.SerializerMethodField()
+
+    class Meta:
+        model = QuizStats
+        fields = ['quiz', 'count', 'mean', 'stddev', 'score_min', 'score_max', 'histogram', 'question_correct', 'updated_at']
+
+    def get_stddev(self, obj):
+        variance = obj.variance
+        return variance ** 0.5 if variance is not None else None
@@ -0,0 +1,167 @@
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import answer_rows
+from . import jobs, tasks
+from . import search
+from .models import Course, Material, Question, Quiz, QuizStats, SearchDocument, Submission
+from .response_cache import USERS_SCOPE, bump
+from .authentication import bump_token_version
+from .roles import invalidate_roles
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Papéis em cache deixam de valer quando os grupos mudam (por qualquer lado)
+    if not reverse:
+        if action not in ('post_add', 'post_remove', 'post_clear'):
+            return
+        user_ids = [instance.pk]
+    elif action == 'pre_clear':
+        user_ids = list(instance.user_set.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        user_ids = list(pk_set)
+    else:
+        return
+    invalidate_roles(*user_ids)
+    # Tokens com as claims de papel antigas deixam de ser aceitos
+    bump_token_version(*user_ids)
+    bump(USERS_SCOPE)
+
+
+# Campos do User copiados para as claims do token (além dos grupos)
+TOKEN_FLAGS = ('is_active', 'is_staff', 'is_superuser')
+
+
+@receiver(pre_save, sender=User)
+def user_before_save(sender, instance, update_fields=None, **kwargs):
+    # Guarda as flags anteriores para o post_save saber se os tokens caducaram
+    instance._previous_token_flags = None
+    if instance.pk and not instance._state.adding and (update_fields is None or set(TOKEN_FLAGS) & set(update_fields)):
+        instance._previous_token_flags = User.objects.filter(pk=instance.pk).values_list(*TOKEN_FLAGS).first()
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # O login só grava last_login, que não aparece nas respostas
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    previous = instance.__dict__.pop('_previous_token_flags', None)
+    if previous is not None and previous != tuple(getattr(instance, flag) for flag in TOKEN_FLAGS):
+        # Rebaixado ou desativado: os tokens com as claims antigas deixam de valer
+        bump_token_version(instance.pk)
+    bump(USERS_SCOPE)
+
+
+@receiver([post_save, post_delete], sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump(USERS_SCOPE)
+
+
+def material_file_referenced(name):
+    return Material.objects.filter(file=name).exists()
+
+
+def collect_material_file(storage, name):
+    # Remove o arquivo, após o commit, quando nenhum outro Material aponta para ele
+    def collect():
+        if not material_file_referenced(name):
+            storage.collect(name, material_file_referenced, settings.MATERIAL_BLOB_GRACE)
+
+    transaction.on_commit(collect)
+
+
+@receiver(post_delete, sender=Material)
+def material_deleted(sender, instance, **kwargs):
+    if instance.file.name:
+        collect_material_file(instance.file.storage, instance.file.name)
+
+
+@receiver(pre_save, sender=Material)
+def material_file_before_save(sender, instance, update_fields=None, **kwargs):
+    # Guarda o arquivo anterior para o post_save saber se ele foi trocado
+    instance._previous_file = None
+    if instance.pk and not instance._state.adding and (update_fields is None or 'file' in update_fields):
+        instance._previous_file = Material.objects.filter(pk=instance.pk).values_list('file', flat=True).first()
+
+
+@receiver(post_save, sender=Material)
+def material_file_replaced(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_file', None)
+    if previous and previous != instance.file.name:
+        collect_material_file(instance.file.storage, previous)
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    bump('courses', f'course:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=Material)
+def course_material_changed(sender, instance, **kwargs):
+    bump('courses', f'course:{instance.course_id}')
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    bump('courses', f'course:{instance.course_id}', f'quiz:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=Question)
+def quiz_question_changed(sender, instance, **kwargs):
+    # A lista de cursos não inclui questões; só o detalhe do curso e do quiz
+    bump(f'course:{search.question_course_id(instance)}', f'quiz:{instance.quiz_id}')
+
+
+@receiver(post_save, sender=Submission)
+@receiver(post_delete, sender=Submission)
+def submission_changed(sender, instance, created=False, **kwargs):
+    # Inserções já atualizam o agregado; edições e remoções o descartam
+    # e o worker o recalcula (até lá, a leitura calcula em memória)
+    if not created:
+        QuizStats.objects.filter(quiz_id=instance.quiz_id).delete()
+        tasks.enqueue(jobs.refresh_quiz_stats, instance.quiz_id, key=f'quiz-stats:{instance.quiz_id}')
+
+
+@receiver(post_save, sender=Submission)
+def submission_saved(sender, instance, created, **kwargs):
+    # Mantém as respostas normalizadas em dia com o JSON
+    answer_rows.write([instance], replace=not created)
+
+
+SEARCH_KINDS = {
+    Course: SearchDocument.COURSE,
+    Material: SearchDocument.MATERIAL,
+    Question: SearchDocument.QUESTION,
+}
+
+
+@receiver(post_save, sender=Course)
+def course_search_index(sender, instance, **kwargs):
+    search.index_course(instance)
+
+
+@receiver(post_save, sender=Material)
+def material_search_index(sender, instance, **kwargs):
+    search.index_material(instance)
+
+
+@receiver(post_save, sender=Question)
+def question_search_index(sender, instance, **kwargs):
+    search.index_question(instance)
+
+
+@receiver(post_save, sender=Quiz)
+def quiz_search_index(sender, instance, created, **kwargs):
+    if not created:
+        search.quiz_moved(instance)
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Material)
+@receiver(post_delete, sender=Question)
+def search_document_deleted(sender, instance, **kwargs):
+    search.remove(SEARCH_KINDS[sender], instance.pk)
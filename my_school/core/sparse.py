@@ -0,0 +1,133 @@
+"""Campos esparsos (?fields=) e expansão seletiva (?expand=) em list/retrieve.
+
+?fields=id,name,teacher.username mantém só os campos pedidos; um campo
+aninhado sem sub-campos vem inteiro. Com ?expand= presente, só as relações
+listadas (ex.: expand=quizzes,quizzes.questions) vêm aninhadas; as demais
+viram o pk (ou a lista de pks). Sem os parâmetros a saída não muda.
+
+A poda é feita na instância do serializer e o plano de carregamento
+(core.query_plan) é calculado a partir dela, então relações removidas não
+geram select_related nem prefetch.
+"""
+from rest_framework import exceptions, serializers
+from rest_framework.permissions import SAFE_METHODS
+
+from .query_plan import optimize_queryset
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse(value):
+    """'a,b.c,b.d' -> {'a': {}, 'b': {'c': {}, 'd': {}}}"""
+    tree = {}
+    for path in value.split(','):
+        path = path.strip()
+        if not path:
+            continue
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def _nested(field):
+    """Serializer filho de uma relação aninhada (to-one ou many), ou None"""
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    return field if isinstance(field, serializers.ModelSerializer) else None
+
+
+def _primary_key_field(name, field):
+    kwargs = {'read_only': True, 'many': isinstance(field, serializers.ListSerializer)}
+    if field.source != name:
+        kwargs['source'] = field.source
+    return serializers.PrimaryKeyRelatedField(**kwargs)
+
+
+def prune(serializer, fields=None, expand=None, prefix=''):
+    """Remove da instância os campos fora de `fields` e recolhe as relações fora de `expand`"""
+    if fields:
+        unknown = sorted(set(fields) - set(serializer.fields))
+        if unknown:
+            raise exceptions.ParseError(f'campo desconhecido em {FIELDS_PARAM}: {prefix}{unknown[0]}')
+        for name in list(serializer.fields):
+            if name not in fields:
+                serializer.fields.pop(name)
+    if expand:
+        for name in expand:
+            if name not in serializer.fields or _nested(serializer.fields[name]) is None:
+                raise exceptions.ParseError(f'campo não expansível em {EXPAND_PARAM}: {prefix}{name}')
+
+    for name, field in list(serializer.fields.items()):
+        child = _nested(field)
+        if child is None:
+            continue
+        child_fields = fields.get(name) if fields else None
+        if expand is None:
+            child_expand = None
+        elif name in expand:
+            child_expand = expand[name]
+        elif child_fields:
+            # Pedir sub-campos de uma relação implica expandi-la
+            child_expand = {}
+        else:
+            serializer.fields[name] = _primary_key_field(name, field)
+            continue
+        prune(child, child_fields, child_expand, f'{prefix}{name}.')
+
+
+def select(data, fields):
+    """Aplica a árvore de `fields` a dados já representados (dicts e listas)"""
+    if isinstance(data, list):
+        return [select(item, fields) for item in data]
+    if not fields or not isinstance(data, dict):
+        return data
+    return {name: select(value, fields[name]) for name, value in data.items() if name in fields}
+
+
+class SparseFieldsMixin:
+    """Aplica ?fields= e ?expand= ao serializer e ao queryset das ações de leitura.
+
+    Os viewsets montam o queryset com `get_optimized_queryset` e podem
+    perguntar `wants(campo)` antes de anotar valores caros.
+    """
+    sparse_actions = ('list', 'retrieve')
+
+    def get_sparse_params(self):
+        """(fields, expand) da requisição, ou None se a saída é a completa"""
+        # A API navegável troca self.request ao montar os formulários de escrita
+        if getattr(self, '_sparse_request', None) is not self.request:
+            self._sparse_request = self.request
+            params = self.request.query_params
+            self._sparse_params = None
+            if self.action in self.sparse_actions and self.request.method in SAFE_METHODS:
+                fields = parse(params.get(FIELDS_PARAM, '')) or None
+                expand = parse(params[EXPAND_PARAM]) if EXPAND_PARAM in params else None
+                if fields is not None or expand is not None:
+                    self._sparse_params = fields, expand
+        return self._sparse_params
+
+    def wants(self, name):
+        sparse = self.get_sparse_params()
+        return sparse is None or sparse[0] is None or name in sparse[0]
+
+    def _prune(self, serializer):
+        sparse = self.get_sparse_params()
+        if sparse is not None:
+            prune(serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer, *sparse)
+        return serializer
+
+    def get_serializer(self, *args, **kwargs):
+        return self._prune(super().get_serializer(*args, **kwargs))
+
+    def get_optimized_queryset(self, queryset):
+        serializer_class = self.get_serializer_class()
+        if self.get_sparse_params() is None:
+            return optimize_queryset(queryset, serializer_class)
+        serializer = self._prune(serializer_class(context=self.get_serializer_context()))
+        return optimize_queryset(queryset, serializer_class, serializer)
+
+    def use_fast_path(self):
+        # O fastpath monta sempre a representação completa
+        return self.get_sparse_params() is None and super().use_fast_path()
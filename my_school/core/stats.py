@@ -0,0 +1,106 @@
+from django.db import router, transaction
+
+from .grading import get_answer_key, grade_detail
+from .models import Quiz, QuizStats, Submission
+
+MARK_BATCH_SIZE = 500
+
+
+def _bin(score):
+    return min(int(score // 10), QuizStats.HISTOGRAM_BINS - 1)
+
+
+def _apply(stats, results):
+    """Soma ao agregado uma lista de (score, ids das questões acertadas)"""
+    if len(stats.histogram) != QuizStats.HISTOGRAM_BINS:
+        stats.histogram = [0] * QuizStats.HISTOGRAM_BINS
+    for score, correct in results:
+        stats.count += 1
+        stats.score_sum += score
+        stats.score_sum_sq += score * score
+        stats.score_min = score if stats.score_min is None else min(stats.score_min, score)
+        stats.score_max = score if stats.score_max is None else max(stats.score_max, score)
+        stats.histogram[_bin(score)] += 1
+        for question_id in correct:
+            stats.question_correct[question_id] = stats.question_correct.get(question_id, 0) + 1
+
+
+def _result(score, answers, answer_key):
+    return score or 0.0, grade_detail(answers, answer_key)[1]
+
+
+def _mark_applied(db, pks):
+    for start in range(0, len(pks), MARK_BATCH_SIZE):
+        Submission.objects.using(db).filter(pk__in=pks[start:start + MARK_BATCH_SIZE]).update(stats_applied=True)
+
+
+def rebuild(quiz_id):
+    """Recalcula e grava as estatísticas do quiz a partir de todas as submissões"""
+    db = router.db_for_write(QuizStats)
+    answer_key = get_answer_key(quiz_id)
+    with transaction.atomic(using=db):
+        # Serializa rebuilds concorrentes (ex.: a mesma tarefa em dois workers),
+        # que senão gravariam a mesma chave de QuizStats ao mesmo tempo
+        if not list(Quiz.objects.using(db).select_for_update().filter(pk=quiz_id).values_list('pk')):
+            return None  # quiz removido depois de a tarefa ser enfileirada
+        rows = Submission.objects.using(db).filter(quiz_id=quiz_id).values_list('pk', 'score', 'answers', 'stats_applied')
+        results, unapplied = [], []
+        for pk, score, answers, applied in rows.iterator():
+            results.append(_result(score, answers, answer_key))
+            if not applied:
+                unapplied.append(pk)
+        QuizStats.objects.using(db).filter(quiz_id=quiz_id).delete()
+        stats = QuizStats(quiz_id=quiz_id)
+        _apply(stats, results)
+        stats.save(using=db)
+        # Só as submissões lidas acima: as gravadas depois ficam para o próximo refresh
+        _mark_applied(db, unapplied)
+    return stats
+
+
+def current(quiz_id, stats=None):
+    """Agregado com as submissões ainda não contadas, calculado só em memória.
+
+    Para leituras (GET): não grava nada; quem persiste é refresh/rebuild no
+    worker. Sem `stats`, calcula a partir de todas as submissões.
+    """
+    submissions = Submission.objects.filter(quiz_id=quiz_id)
+    if stats is None:
+        stats = QuizStats(quiz_id=quiz_id)
+    else:
+        stats = QuizStats(
+            quiz_id=quiz_id, count=stats.count, score_sum=stats.score_sum, score_sum_sq=stats.score_sum_sq,
+            score_min=stats.score_min, score_max=stats.score_max, histogram=list(stats.histogram),
+            question_correct=dict(stats.question_correct), updated_at=stats.updated_at,
+        )
+        submissions = submissions.filter(stats_applied=False)
+    answer_key = get_answer_key(quiz_id)
+    _apply(stats, [_result(score, answers, answer_key) for score, answers in submissions.values_list('score', 'answers')])
+    return stats
+
+
+def has_pending(quiz_id):
+    return Submission.objects.filter(quiz_id=quiz_id, stats_applied=False).exists()
+
+
+def refresh(quiz_id):
+    """Soma ao agregado as submissões do quiz que ainda não foram contadas.
+
+    Idempotente: cada submissão é marcada (stats_applied) na mesma transação
+    em que entra no agregado. Se o quiz ainda não tem agregado, recalcula tudo.
+    """
+    db = router.db_for_write(QuizStats)
+    with transaction.atomic(using=db):
+        stats = QuizStats.objects.using(db).select_for_update().filter(quiz_id=quiz_id).first()
+        if stats is None:
+            return rebuild(quiz_id)
+        pending = list(
+            Submission.objects.using(db).filter(quiz_id=quiz_id, stats_applied=False)
+            .values_list('pk', 'score', 'answers')
+        )
+        if pending:
+            answer_key = get_answer_key(quiz_id)
+            _apply(stats, [_result(score, answers, answer_key) for _, score, answers in pending])
+            stats.save(using=db)
+            _mark_applied(db, [pk for pk, _, _ in pending])
+    return stats
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, storages
+
+HASH_BLOCK_SIZE = 64 * 1024
+BLOB_RE = re.compile(r'^([0-9a-f]{64})(\.[\w-]*)?$')
+
+
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Storage que grava cada conteúdo uma única vez.
+
+    O arquivo fica em `<upload_to>/<sha[:2]>/<sha256><ext>`; reenvios do mesmo
+    conteúdo apontam para o blob existente sem gravar nada, só renovando o
+    mtime. A contagem de referências é a própria tabela que usa o campo (ver
+    `core.signals`); `collect` apaga um blob sem referências.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # O nome final depende do conteúdo e é decidido em _save
+        return name
+
+    def blob_name(self, directory, digest, ext):
+        return os.path.join(directory, digest[:2], f'{digest}{ext}').replace('\\', '/')
+
+    def content_hash(self, name):
+        match = BLOB_RE.match(os.path.basename(name or ''))
+        return match.group(1) if match else None
+
+    def _spool(self, content, directory):
+        """Copia o conteúdo para um temporário no mesmo disco, calculando o hash"""
+        os.makedirs(directory, exist_ok=True)
+        hasher = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as tmp:
+            for chunk in content.chunks():
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                hasher.update(chunk)
+                tmp.write(chunk)
+        return tmp.name, hasher.hexdigest()
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        ext = os.path.splitext(filename)[1].lower()[:16]
+
+        spooled = None
+        digest = getattr(content, 'sha256', None)
+        if hasattr(content, 'temporary_file_path'):
+            source = content.temporary_file_path()
+            digest = digest or file_sha256(source)
+        else:
+            spooled, digest = self._spool(content, self.path(directory))
+            source = spooled
+
+        blob = self.blob_name(directory, digest, ext)
+        full_path = self.path(blob)
+        try:
+            # Conteúdo duplicado: reaproveita o blob; o mtime novo o protege de
+            # um collect concorrente até a linha que o referencia ser gravada
+            os.utime(full_path)
+        except FileNotFoundError:
+            pass
+        else:
+            if spooled:
+                os.remove(spooled)
+            return blob
+
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        if spooled:
+            os.replace(spooled, full_path)
+        else:
+            file_move_safe(source, full_path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+        return blob
+
+    def collect(self, name, is_referenced, grace):
+        """Apaga o blob se nada o referencia e ele não foi reaproveitado nos últimos `grace` segundos.
+
+        O blob é renomeado antes da checagem final: um upload anterior ao
+        rename renovou o mtime e o blob volta; um posterior não o encontra e
+        grava o conteúdo de novo. Devolve True se o blob foi apagado.
+        """
+        path = self.path(name)
+        tombstone = f'{path}.gc'
+        try:
+            os.rename(path, tombstone)
+        except FileNotFoundError:
+            # Sem o blob, só resta retomar um collect interrompido
+            if not os.path.exists(tombstone):
+                return False
+        try:
+            if time.time() - os.stat(tombstone).st_mtime < grace or is_referenced(name):
+                # Mesmo conteúdo, então sobrescrever um blob regravado nesse meio-tempo é inofensivo
+                os.replace(tombstone, path)
+                return False
+            os.remove(tombstone)
+        except FileNotFoundError:
+            # Outro collect do mesmo blob terminou antes
+            return False
+        return True
+
+    def blobs(self, directory):
+        """Nomes dos blobs sob `directory`, incluindo os de collects interrompidos"""
+        for dirpath, _, filenames in os.walk(self.path(directory)):
+            for filename in {filename.removesuffix('.gc') for filename in filenames}:
+                if BLOB_RE.match(filename):
+                    yield os.path.relpath(os.path.join(dirpath, filename), self.location).replace('\\', '/')
+
+
+def material_storage():
+    return storages['materials']
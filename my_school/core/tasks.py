@@ -0,0 +1,127 @@
+"""Fila de tarefas em segundo plano guardada na tabela core.Task.
+
+Tarefas são funções registradas com @task e enfileiradas com enqueue(),
+normalmente na mesma transação que gravou os dados (a tarefa só fica visível
+para o worker depois do commit). O comando run_tasks as executa em um pool
+de threads ou processos, com novas tentativas e espera exponencial.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(max_attempts=3):
+    """Registra a função como tarefa, com o nome `<módulo>.<função>`"""
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        _registry[func.task_name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, *args, key='', delay=0):
+    """Enfileira `func(*args)`; os argumentos precisam ser serializáveis em JSON.
+
+    Com `key`, não enfileira se já houver uma tarefa pendente com a mesma
+    chave (útil para tarefas idempotentes, como recalcular um agregado).
+    Com TASKS_EAGER a tarefa roda no próprio processo, após o commit.
+    """
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: _run_eager(func, args))
+        return None
+    if key and Task.objects.filter(key=key, status=Task.PENDING).exists():
+        return None
+    return Task.objects.create(
+        name=func.task_name, args=list(args), key=key, max_attempts=func.max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def _run_eager(func, args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Tarefa %s falhou', func.task_name)
+
+
+def claim(worker, limit):
+    """Reserva até `limit` tarefas vencidas para o worker; devolve os ids.
+
+    A reserva é um UPDATE condicional, então dois workers nunca pegam a
+    mesma tarefa, em qualquer banco.
+    """
+    now = timezone.now()
+    candidates = (
+        Task.objects.filter(status=Task.PENDING, run_at__lte=now)
+        .order_by('run_at', 'pk')
+        .values_list('pk', flat=True)[:limit * 2]
+    )
+    claimed = []
+    for pk in candidates:
+        updated = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(pk)
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def release_stale(older_than):
+    """Devolve à fila tarefas presas em execução (worker que morreu no meio).
+
+    A tentativa já foi contada no claim; a tarefa que esgotou max_attempts
+    é marcada como falha, para não derrubar workers para sempre. Devolve
+    (devolvidas, com falha).
+    """
+    stale = Task.objects.filter(
+        status=Task.RUNNING, locked_at__lt=timezone.now() - timedelta(seconds=older_than),
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED, locked_by='', locked_at=None,
+        last_error=f'execução abandonada: sem resposta do worker após {older_than}s',
+    )
+    released = stale.filter(attempts__lt=F('max_attempts')).update(status=Task.PENDING, locked_by='', locked_at=None)
+    if failed:
+        logger.warning('%s tarefas abandonadas esgotaram as tentativas', failed)
+    return released, failed
+
+
+def run(task_id):
+    """Executa uma tarefa reservada; apaga se der certo, reagenda ou marca como falha se não"""
+    try:
+        task = Task.objects.get(pk=task_id)
+        func = _registry.get(task.name)
+        try:
+            if func is None:
+                raise LookupError(f'tarefa não registrada: {task.name}')
+            func(*task.args)
+        except Exception:
+            error = traceback.format_exc()
+            if func is not None and task.attempts < task.max_attempts:
+                delay = settings.TASKS_RETRY_DELAY * 2 ** (task.attempts - 1)
+                Task.objects.filter(pk=task_id).update(
+                    status=Task.PENDING, locked_by='', locked_at=None, last_error=error,
+                    run_at=timezone.now() + timedelta(seconds=delay),
+                )
+            else:
+                Task.objects.filter(pk=task_id).update(status=Task.FAILED, last_error=error)
+            logger.warning('Tarefa %s (%s) falhou na tentativa %s', task.name, task_id, task.attempts)
+            return False
+        Task.objects.filter(pk=task_id).delete()
+        return True
+    finally:
+        close_old_connections()
@@ -0,0 +1,990 @@
+import hashlib
+import io
+import os
+import time
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from . import stats as quiz_stats
+from . import analytics, search, tasks, uploads
+from .authentication import (
+    ClaimsUser, _token_version_cache_key, bump_token_version, get_token_state, get_token_version,
+)
+from .fastpath import FastReadMixin
+from .grading import get_answer_key, get_answer_keys
+from .response_cache import bump, get_generations
+from .replicas import REPLICA_ALIAS, STICKY_COOKIE
+from .roles import _roles_cache_key, get_roles
+from .models import (
+    Course, Material, MaterialUpload, Profile, Question, Quiz, QuizStats, SearchDocument, Submission, Task,
+)
+
+PASSWORD = 'senha-de-teste'
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class APITestCase(TestCase):
+    """Base com professor, aluno e admin; os clientes usam JWT de verdade (/api/token/)"""
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        professor = Group.objects.create(name='professor')
+        aluno = Group.objects.create(name='aluno')
+        self.teacher = User.objects.create_user('prof1', password=PASSWORD)
+        self.teacher.groups.add(professor)
+        self.student = User.objects.create_user('aluno1', password=PASSWORD)
+        self.student.groups.add(aluno)
+        self.admin = User.objects.create_superuser('admin', password=PASSWORD)
+
+    def jwt_client(self, user):
+        client = APIClient()
+        response = client.post('/api/token/', {'username': user.username, 'password': PASSWORD}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return client
+
+    def create_courses(self, count, teacher=None, questions=3):
+        teacher = teacher or self.teacher
+        courses = []
+        for i in range(count):
+            course = Course.objects.create(name=f'Curso {i}', description='d', teacher=teacher)
+            for j in range(2):
+                Material.objects.create(title=f'Material {j}', course=course, owner=teacher,
+                                        file=f'materials/m{i}-{j}.txt')
+                quiz = Quiz.objects.create(title=f'Quiz {j}', course=course, owner=teacher)
+                Question.objects.bulk_create([
+                    Question(quiz=quiz, text=f'Questão {k}', option_a='a', option_b='b', option_c='c',
+                             option_d='d', correct_option='ABCD'[k % 4])
+                    for k in range(questions)
+                ])
+            courses.append(course)
+        return courses
+
+
+class ClaimsAuthenticationTests(APITestCase):
+    def test_claims_user_pk_is_int(self):
+        client = self.jwt_client(self.teacher)
+        response = client.get('/api/users/me/')
+        self.assertEqual(response.status_code, 200)
+        user = response.wsgi_request.user
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.pk, self.teacher.pk)
+
+    def test_bump_token_version_without_profile(self):
+        Profile.objects.filter(user=self.student).delete()
+        bump_token_version(self.student.pk)
+        bump_token_version(self.student.pk)
+        self.assertEqual(get_token_version(self.student.pk), 2)
+
+
+    def test_demoted_admin_loses_access(self):
+        client = self.jwt_client(self.admin)
+        self.assertEqual(client.get('/api/users/').status_code, 200)
+        self.admin.is_staff = self.admin.is_superuser = False
+        self.admin.save()
+        self.assertEqual(client.get('/api/users/').status_code, 401)
+        self.assertEqual(self.jwt_client(self.admin).get('/api/users/').status_code, 403)
+
+    def test_deactivated_user_is_rejected(self):
+        client = self.jwt_client(self.student)
+        self.assertEqual(client.get('/api/submissions/').status_code, 200)
+        User.objects.get(pk=self.student.pk).save(update_fields=['first_name'])
+        self.assertEqual(client.get('/api/submissions/').status_code, 200)
+        self.student.is_active = False
+        self.student.save(update_fields=['is_active'])
+        self.assertEqual(client.get('/api/submissions/').status_code, 401)
+        response = APIClient().post('/api/token/', {'username': 'aluno1', 'password': PASSWORD}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_token_version_cached_before_commit_is_discarded(self):
+        client = self.jwt_client(self.student)
+        stale = get_token_state(self.student.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.groups.add(Group.objects.get(name='professor'))
+            # Leitura concorrente que ainda via a versão antiga regrava o cache
+            caches['default'].set(_token_version_cache_key(self.student.pk), stale)
+        self.assertEqual(client.get('/api/submissions/').status_code, 401)
+
+
+class GradebookTests(APITestCase):
+    def test_teacher_exports_own_course(self):
+        course, = self.create_courses(1)
+        response = self.jwt_client(self.teacher).get(f'/api/courses/{course.pk}/gradebook/')
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        self.assertTrue(content.startswith('student_id,username,Quiz 0,Quiz 1'))
+
+    def test_other_teacher_is_forbidden(self):
+        course, = self.create_courses(1)
+        other = User.objects.create_user('prof2', password=PASSWORD)
+        other.groups.add(Group.objects.get(name='professor'))
+        response = self.jwt_client(other).get(f'/api/courses/{course.pk}/gradebook/')
+        self.assertEqual(response.status_code, 403)
+
+
+class SubmissionAnswersTests(APITestCase):
+    def test_answers_must_be_an_object(self):
+        course, = self.create_courses(1)
+        quiz = course.quizzes.first()
+        client = self.jwt_client(self.student)
+        for answers in (['A'], 'A', {'1': 2}):
+            response = client.post('/api/submissions/', {'quiz': quiz.pk, 'answers': answers}, format='json')
+            self.assertEqual(response.status_code, 400, answers)
+            self.assertIn('answers', response.data)
+
+    def test_valid_answers_are_graded(self):
+        course, = self.create_courses(1)
+        quiz = course.quizzes.first()
+        answers = {str(pk): option for pk, option in quiz.questions.values_list('pk', 'correct_option')}
+        response = self.jwt_client(self.student).post('/api/submissions/', {'quiz': quiz.pk, 'answers': answers}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['score'], 100.0)
+
+
+    def test_answer_key_follows_question_edits_without_invalidation(self):
+        course, = self.create_courses(1)
+        quiz = course.quizzes.first()
+        question = quiz.questions.order_by('pk').first()
+        self.assertEqual(get_answer_key(quiz.pk)[str(question.pk)], 'A')
+        # Edição vista por outro processo: nenhum signal roda neste
+        Question.objects.filter(pk=question.pk).update(correct_option='D', updated_at=timezone.now())
+        self.assertEqual(get_answer_key(quiz.pk)[str(question.pk)], 'D')
+        Question.objects.filter(pk=question.pk).delete()
+        self.assertNotIn(str(question.pk), get_answer_keys([quiz.pk])[quiz.pk])
+
+
+class ResponseCacheTests(APITestCase):
+    def test_role_change_invalidates_embedded_teacher(self):
+        course, = self.create_courses(1)
+        client = self.jwt_client(self.student)
+        url = f'/api/courses/{course.pk}/'
+        self.assertEqual(client.get(url).data['teacher']['groups'][0]['name'], 'professor')
+        admin = self.jwt_client(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = admin.post(f'/api/users/{self.teacher.pk}/assign_role/', {'role': 'aluno'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get(url).data['teacher']['groups'][0]['name'], 'aluno')
+
+    def test_generation_changes_only_after_commit(self):
+        before = get_generations(['courses'])
+        with self.captureOnCommitCallbacks() as callbacks:
+            bump('courses')
+            # Um leitor concorrente ainda vê as linhas antigas: a geração não muda
+            self.assertEqual(get_generations(['courses']), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_generations(['courses']), before)
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'a.example.com', 'b.example.com'])
+    def test_file_urls_follow_request_host(self):
+        course, = self.create_courses(1)
+        client = self.jwt_client(self.student)
+        url = f'/api/courses/{course.pk}/'
+        first = client.get(url, HTTP_HOST='a.example.com').data['materials'][0]['file']
+        second = client.get(url, HTTP_HOST='b.example.com').data['materials'][0]['file']
+        self.assertTrue(first.startswith('http://a.example.com/'))
+        self.assertTrue(second.startswith('http://b.example.com/'))
+
+
+class ConditionalGetTests(APITestCase):
+    def test_not_modified_carries_etag(self):
+        course, = self.create_courses(1)
+        client = self.jwt_client(self.student)
+        url = f'/api/courses/{course.pk}/'
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_role_change_of_embedded_user_changes_etag(self):
+        course, = self.create_courses(1)
+        client = self.jwt_client(self.student)
+        url = f'/api/courses/{course.pk}/'
+        etag = client.get(url)['ETag']
+        admin = self.jwt_client(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.post(f'/api/users/{self.teacher.pk}/assign_role/', {'role': 'aluno'}, format='json')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['teacher']['groups'][0]['name'], 'aluno')
+
+
+class QueryCountTests(APITestCase):
+    # Autenticação (versão do token), ETag, versão dos usuários embutidos e
+    # dados; o número não pode crescer com a quantidade de cursos ou questões
+    LIST_QUERIES = 8
+    DETAIL_QUERIES = 12
+
+    def assert_queries(self, client, url, expected):
+        for cache in caches.all():
+            cache.clear()
+        with self.assertNumQueries(expected):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_course_list_and_detail(self):
+        client = self.jwt_client(self.student)
+        for count, questions in ((2, 2), (20, 10)):
+            courses = self.create_courses(count, questions=questions)
+            with self.subTest(courses=count):
+                response = self.assert_queries(client, '/api/courses/?page_size=200', self.LIST_QUERIES)
+                self.assertEqual(len(response.data['results']), Course.objects.count())
+                self.assert_queries(client, f'/api/courses/{courses[-1].pk}/', self.DETAIL_QUERIES)
+
+
+class FastPathTests(APITestCase):
+    """O atalho de .values() gera os mesmos bytes que os serializers"""
+
+    def get(self, client, url, fast_path):
+        # O cache de respostas esconderia diferenças entre os dois caminhos
+        for cache in caches.all():
+            cache.clear()
+        with mock.patch.object(FastReadMixin, 'fast_path', fast_path):
+            return client.get(url)
+
+    def test_same_output_as_serializers(self):
+        courses = self.create_courses(2)
+        student = self.jwt_client(self.student)
+        for quiz in Quiz.objects.filter(course=courses[0]):
+            answers = {str(pk): 'A' for pk in quiz.questions.values_list('pk', flat=True)}
+            response = student.post('/api/submissions/', {'quiz': quiz.pk, 'answers': answers}, format='json')
+            self.assertEqual(response.status_code, 201)
+
+        urls = []
+        for prefix, queryset in (('courses', Course.objects), ('quizzes', Quiz.objects),
+                                 ('submissions', courses[0].quizzes.first().submissions)):
+            urls.append(f'/api/{prefix}/?page_size=200')
+            urls += [f'/api/{prefix}/{pk}/' for pk in queryset.values_list('pk', flat=True)]
+        for user in (self.admin, self.teacher, self.student):
+            client = self.jwt_client(user)
+            for url in urls:
+                with self.subTest(user=user.username, url=url):
+                    expected = self.get(client, url, fast_path=False)
+                    actual = self.get(client, url, fast_path=True)
+                    self.assertEqual(actual.status_code, expected.status_code)
+                    self.assertEqual(actual.content, expected.content)
+
+
+class QuizUpdateTests(APITestCase):
+    def test_get_put_round_trip_keeps_questions(self):
+        course, = self.create_courses(1)
+        quiz = course.quizzes.first()
+        client = self.jwt_client(self.teacher)
+        url = f'/api/quizzes/{quiz.pk}/'
+        data = client.get(url).data
+        data['title'] = 'Quiz editado'
+        data['questions'] = data['questions'][:1]
+        response = client.put(url, data, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['title'], 'Quiz editado')
+        self.assertEqual(quiz.questions.count(), 3)
+
+
+class MaterialFileTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = override_settings(MEDIA_ROOT=media, MATERIAL_BLOB_GRACE=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.course, = self.create_courses(1)
+
+    def create_material(self, content):
+        return Material.objects.create(title='m', course=self.course, owner=self.teacher,
+                                       file=ContentFile(content, name='m.txt'))
+
+    def blob_exists(self, name):
+        return os.path.exists(Material.file.field.storage.path(name))
+
+    def test_replacing_file_collects_previous_blob(self):
+        material = self.create_material(b'antigo')
+        old = material.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.jwt_client(self.teacher).patch(
+                f'/api/materials/{material.pk}/', {'file': ContentFile(b'novo', name='n.txt')}, format='multipart',
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        material.refresh_from_db()
+        self.assertNotEqual(material.file.name, old)
+        self.assertFalse(self.blob_exists(old))
+        self.assertTrue(self.blob_exists(material.file.name))
+
+    @override_settings(MATERIAL_BLOB_GRACE=3600)
+    def test_blob_reused_by_concurrent_upload_is_kept(self):
+        material = self.create_material(b'conteudo')
+        name = material.file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            material.delete()
+            # Upload do mesmo conteúdo cuja linha ainda não foi gravada
+            self.assertEqual(Material.file.field.storage.save('materials/x.txt', ContentFile(b'conteudo')), name)
+        self.assertTrue(self.blob_exists(name))
+
+        # A varredura apaga o blob quando ninguém passa a referenciá-lo
+        call_command('collect_material_files', grace=3600, stdout=io.StringIO())
+        self.assertTrue(self.blob_exists(name))
+        call_command('collect_material_files', grace=0, stdout=io.StringIO())
+        self.assertFalse(self.blob_exists(name))
+
+    def test_shared_blob_survives_delete_of_one_material(self):
+        first = self.create_material(b'igual')
+        second = self.create_material(b'igual')
+        self.assertEqual(first.file.name, second.file.name)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(self.blob_exists(second.file.name))
+        call_command('collect_material_files', stdout=io.StringIO())
+        self.assertTrue(self.blob_exists(second.file.name))
+
+
+class TaskQueueTests(TestCase):
+    def test_stale_task_fails_after_max_attempts(self):
+        # Tarefa que derruba o worker toda vez: cada claim conta uma tentativa
+        task = Task.objects.create(name='core.tests.trava', max_attempts=2)
+        for attempt in (1, 2):
+            self.assertEqual(tasks.claim('w1', 1), [task.pk])
+            Task.objects.filter(pk=task.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+            released, failed = tasks.release_stale(60)
+            task.refresh_from_db()
+            self.assertEqual(task.attempts, attempt)
+            self.assertEqual((released, failed), (1, 0) if attempt == 1 else (0, 1))
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.locked_by, '')
+        self.assertEqual(tasks.claim('w1', 1), [])
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.course, = self.create_courses(1)
+        self.quiz = self.course.quizzes.order_by('pk').first()
+        self.client = self.jwt_client(self.student)
+
+    def get(self, url):
+        for cache in caches.all():
+            cache.clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_lists_on_sync_and_async_routes(self):
+        for prefix in ('/api/', '/api/async/'):
+            with self.subTest(prefix=prefix):
+                self.assertEqual(self.get(f'{prefix}courses/?fields=id')['results'], [{'id': self.course.pk}])
+                self.assertEqual(
+                    self.get(f'{prefix}courses/?fields=id,quizzes_count')['results'],
+                    [{'id': self.course.pk, 'quizzes_count': 2}],
+                )
+                results = self.get(f'{prefix}quizzes/?fields=id,questions_count,owner.username')['results']
+                self.assertEqual(results[0].keys(), {'id', 'questions_count', 'owner'})
+                self.assertEqual(results[0]['owner'], {'username': 'prof1'})
+                self.assertEqual({item['questions_count'] for item in results}, {3})
+
+    def test_details_on_sync_and_async_routes(self):
+        for prefix in ('/api/', '/api/async/'):
+            with self.subTest(prefix=prefix):
+                data = self.get(f'{prefix}courses/{self.course.pk}/?fields=name,quizzes.title')
+                self.assertEqual(data.keys(), {'name', 'quizzes'})
+                self.assertCountEqual(data['quizzes'], [{'title': 'Quiz 0'}, {'title': 'Quiz 1'}])
+                data = self.get(f'{prefix}quizzes/{self.quiz.pk}/?fields=id,questions.correct_option')
+                self.assertEqual(data, {'id': self.quiz.pk, 'questions': [{'correct_option': option} for option in 'ABC']})
+
+    def test_unknown_field_is_rejected(self):
+        for url in ('/api/courses/?fields=nope', '/api/async/courses/?fields=nope',
+                    f'/api/async/quizzes/{self.quiz.pk}/?fields=questions.nope', '/api/async/courses/?expand=teacher'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 400)
+
+
+class QuizStatsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        course, = self.create_courses(1, questions=4)
+        self.quiz = course.quizzes.order_by('pk').first()
+        self.question_ids = [str(pk) for pk in self.quiz.questions.order_by('pk').values_list('pk', flat=True)]
+
+    def submit(self, *options_list):
+        """Submissões gravadas em lote, como as que o worker ainda não contou"""
+        submissions = []
+        for options in options_list:
+            student = User.objects.create_user(f'aluno-{User.objects.count()}')
+            answers = dict(zip(self.question_ids, options))
+            submission = Submission(quiz=self.quiz, student=student, answers=answers)
+            submission.calculate_score()
+            submissions.append(submission)
+        return Submission.objects.bulk_create(submissions)
+
+    def test_rebuild_leaves_submissions_written_meanwhile_pending(self):
+        self.submit('ABCD', 'AAAA')
+        apply = quiz_stats._apply
+
+        def apply_with_concurrent_submission(stats, results):
+            # Submissão commitada entre a leitura e a marcação do rebuild
+            self.submit('ABCA')
+            apply(stats, results)
+
+        with mock.patch.object(quiz_stats, '_apply', apply_with_concurrent_submission):
+            stats = quiz_stats.rebuild(self.quiz.pk)
+        self.assertEqual(stats.count, 2)
+        self.assertTrue(quiz_stats.has_pending(self.quiz.pk))
+        self.assertEqual(quiz_stats.refresh(self.quiz.pk).count, 3)
+        self.assertFalse(quiz_stats.has_pending(self.quiz.pk))
+
+    FIELDS = ('count', 'score_sum', 'score_sum_sq', 'score_min', 'score_max', 'histogram', 'question_correct')
+
+    def aggregate(self, stats):
+        return {name: getattr(stats, name) for name in self.FIELDS}
+
+    def test_stats_endpoint_aggregates(self):
+        # Gabarito ABCD: 100, 25, 75 e 25 pontos
+        self.submit('ABCD', 'AAAA', 'ABCA', 'DDDD')
+        response = self.jwt_client(self.teacher).get(f'/api/quizzes/{self.quiz.pk}/stats/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 4)
+        self.assertAlmostEqual(data['mean'], 56.25)
+        self.assertAlmostEqual(data['stddev'], (((43.75 ** 2) + 2 * (31.25 ** 2) + (18.75 ** 2)) / 4) ** 0.5)
+        self.assertEqual((data['score_min'], data['score_max']), (25.0, 100.0))
+        self.assertEqual(data['histogram'], [0, 0, 2, 0, 0, 0, 0, 1, 0, 1])
+        q0, q1, q2, q3 = self.question_ids
+        self.assertEqual(data['question_correct'], {q0: 3, q1: 2, q2: 2, q3: 2})
+
+    def test_stats_get_does_not_write(self):
+        self.submit('ABCD', 'AAAA')
+        client = self.jwt_client(self.teacher)
+        self.assertEqual(client.get(f'/api/quizzes/{self.quiz.pk}/stats/').json()['count'], 2)
+        self.assertFalse(QuizStats.objects.exists())
+        quiz_stats.rebuild(self.quiz.pk)
+        self.submit('ABCA')
+        self.assertEqual(client.get(f'/api/quizzes/{self.quiz.pk}/stats/').json()['count'], 3)
+        self.assertEqual(QuizStats.objects.get(pk=self.quiz.pk).count, 2)
+        self.assertTrue(quiz_stats.has_pending(self.quiz.pk))
+
+    def test_incremental_refresh_matches_rebuild(self):
+        self.submit('ABCD', 'AAAA')
+        quiz_stats.rebuild(self.quiz.pk)
+        self.submit('ABCA', 'DDDD', 'BBBB')
+        in_memory = self.aggregate(quiz_stats.current(self.quiz.pk, QuizStats.objects.get(pk=self.quiz.pk)))
+        refreshed = self.aggregate(quiz_stats.refresh(self.quiz.pk))
+        rebuilt = self.aggregate(quiz_stats.rebuild(self.quiz.pk))
+        self.assertEqual(refreshed, rebuilt)
+        self.assertEqual(in_memory, rebuilt)
+        self.assertEqual(self.aggregate(quiz_stats.current(self.quiz.pk)), rebuilt)
+
+    def test_edited_submission_discards_aggregate_and_enqueues_rebuild(self):
+        submission, _ = self.submit('ABCD', 'AAAA')
+        quiz_stats.rebuild(self.quiz.pk)
+        submission.answers = dict(zip(self.question_ids, 'AAAA'))
+        submission.calculate_score()
+        submission.save()
+        self.assertFalse(QuizStats.objects.exists())
+        self.assertTrue(Task.objects.filter(key=f'quiz-stats:{self.quiz.pk}', status=Task.PENDING).exists())
+        stats = quiz_stats.refresh(self.quiz.pk)
+        self.assertEqual((stats.count, stats.score_sum), (2, 50.0))
+
+
+@override_settings(DATABASE_ROUTERS=['core.replicas.PrimaryReplicaRouter'], REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTests(APITestCase):
+    """Primário e réplica em bancos SQLite distintos, com dados diferentes.
+
+    A réplica é um arquivo temporário criado aqui (e não pelo test runner),
+    por isso só entra em `databases` no setUpClass.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.settings[REPLICA_ALIAS] = {
+            **connections.settings['default'], 'NAME': os.path.join(cls.replica_dir, 'replica.sqlite3'),
+        }
+        call_command('migrate', database=REPLICA_ALIAS, verbosity=0)
+        cls.databases = {'default', REPLICA_ALIAS}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA_ALIAS].close()
+        del connections[REPLICA_ALIAS]
+        del connections.settings[REPLICA_ALIAS]
+        shutil.rmtree(cls.replica_dir)
+
+    def setUp(self):
+        super().setUp()
+        course, = self.create_courses(1, questions=1)
+        self.question = Question.objects.get(quiz__course=course, quiz__title='Quiz 0')
+        quiz = self.question.quiz
+        # Cópia "atrasada" na réplica: mesma questão com outro texto
+        User.objects.using(REPLICA_ALIAS).bulk_create([self.teacher])
+        Course.objects.using(REPLICA_ALIAS).bulk_create([course])
+        Quiz.objects.using(REPLICA_ALIAS).bulk_create([quiz])
+        replica_question = Question.objects.get(pk=self.question.pk)
+        replica_question.text = 'réplica'
+        Question.objects.using(REPLICA_ALIAS).bulk_create([replica_question])
+        self.url = f'/api/questions/{self.question.pk}/'
+
+    def test_safe_reads_go_to_replica(self):
+        response = self.jwt_client(self.student).get(self.url)
+        self.assertEqual(response.json()['text'], 'réplica')
+        self.assertEqual(len(self.jwt_client(self.student).get('/api/questions/').json()['results']), 1)
+
+    def test_unsafe_methods_use_primary(self):
+        client = self.jwt_client(self.teacher)
+        response = client.patch(self.url, {'option_a': 'x'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # O objeto editado foi lido e gravado no primário
+        self.assertEqual(response.json()['text'], 'Questão 0')
+        self.assertEqual(Question.objects.using(REPLICA_ALIAS).get(pk=self.question.pk).option_a, 'a')
+        self.assertEqual(Question.objects.get(pk=self.question.pk).option_a, 'x')
+
+    def test_writer_is_pinned_to_primary(self):
+        client = self.jwt_client(self.teacher)
+        response = client.patch(self.url, {'text': 'editada'}, format='json')
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.assertEqual(client.get(self.url).json()['text'], 'editada')
+        # Os outros usuários seguem lendo da réplica
+        self.assertEqual(self.jwt_client(self.student).get(self.url).json()['text'], 'réplica')
+
+    def test_pin_survives_cache_loss_through_cookie(self):
+        client = self.jwt_client(self.teacher)
+        client.patch(self.url, {'text': 'editada'}, format='json')
+        caches['default'].clear()
+        self.assertEqual(client.get(self.url).json()['text'], 'editada')
+        # Sem cookie e sem cache, volta à réplica
+        client.cookies.clear()
+        self.assertEqual(client.get(self.url).json()['text'], 'réplica')
+
+    def test_pin_survives_without_cookie_through_shared_cache(self):
+        client = self.jwt_client(self.teacher)
+        client.patch(self.url, {'text': 'editada'}, format='json')
+        client.cookies.clear()
+        self.assertEqual(client.get(self.url).json()['text'], 'editada')
+
+
+class SubmissionBulkTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        course, = self.create_courses(1, questions=2)
+        self.quiz, self.other_quiz = course.quizzes.order_by('pk')
+        self.answers = {str(pk): 'A' for pk in self.quiz.questions.values_list('pk', flat=True)}
+        self.students = [User.objects.create_user(f'lote-{i}') for i in range(3)]
+
+    def post(self, items, user=None):
+        return self.jwt_client(user or self.admin).post('/api/submissions/bulk/', items, format='json')
+
+    def item(self, student, quiz=None):
+        return {'quiz': (quiz or self.quiz).pk, 'student': student.pk, 'answers': self.answers}
+
+    def error_indexes(self, response):
+        return [error['index'] for error in response.json()['errors']]
+
+    def test_valid_items_are_created_despite_partial_errors(self):
+        response = self.post([
+            self.item(self.students[0]),
+            {'quiz': self.quiz.pk, 'answers': {'1': 'AB'}},
+            {'quiz': 0, 'student': self.students[1].pk, 'answers': self.answers},
+            self.item(self.students[2], self.other_quiz),
+        ])
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual([item['index'] for item in data['created']], [0, 3])
+        self.assertEqual(self.error_indexes(response), [1, 2])
+        self.assertEqual(data['errors'][1]['errors'], {'quiz': ['quiz não encontrado']})
+        self.assertEqual(data['created'][0]['score'], 50.0)
+        self.assertEqual(Submission.objects.count(), 2)
+
+    def test_duplicates_inside_batch_keep_the_first(self):
+        response = self.post([self.item(self.students[0]), self.item(self.students[0])])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['index'] for item in response.json()['created']], [0])
+        self.assertEqual(self.error_indexes(response), [1])
+        self.assertEqual(Submission.objects.filter(student=self.students[0]).count(), 1)
+
+    def test_existing_pair_is_reported(self):
+        Submission.objects.create(quiz=self.quiz, student=self.students[0], answers=self.answers)
+        response = self.post([self.item(self.students[0])])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['errors'],
+                         {'non_field_errors': ['o aluno já submeteu este quiz']})
+
+    def test_status_is_400_when_nothing_is_created(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post({'quiz': self.quiz.pk}).status_code, 400)
+        response = self.post([self.item(self.students[0])], user=self.student)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['created'], [])
+
+    def test_concurrent_inserts_are_reported_per_item(self):
+        first, second, third = self.students
+        real_get_answer_keys, real_bulk_create = get_answer_keys, Submission.objects.bulk_create
+        calls = []
+
+        def get_answer_keys_racing(quiz_ids):
+            # Outra requisição grava (first) depois da checagem de existentes
+            Submission.objects.create(quiz=self.quiz, student=first, answers=self.answers)
+            return real_get_answer_keys(quiz_ids)
+
+        def bulk_create_racing(objs, *args, **kwargs):
+            # ... e (third) de novo durante a repetição
+            calls.append(objs)
+            if len(calls) > 1 and any(obj.student_id == third.pk for obj in objs):
+                real_bulk_create([Submission(quiz=self.quiz, student=third, answers=self.answers)])
+            return real_bulk_create(objs, *args, **kwargs)
+
+        with mock.patch('core.views.get_answer_keys', get_answer_keys_racing), \
+                mock.patch.object(Submission.objects, 'bulk_create', bulk_create_racing):
+            response = self.post([self.item(first), self.item(second), self.item(third)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['index'] for item in response.json()['created']], [1])
+        self.assertEqual(self.error_indexes(response), [0, 2])
+        self.assertTrue(Submission.objects.filter(quiz=self.quiz, student=second).exists())
+
+
+@override_settings(MATERIAL_UPLOAD_CHUNK_SIZE=4)
+class MaterialUploadTests(APITestCase):
+    CONTENT = b'conteudo-em-partes'  # 18 bytes: 5 partes de até 4
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = override_settings(MEDIA_ROOT=media, MATERIAL_UPLOAD_TEMP_DIR=os.path.join(media, 'uploads'))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(uploads._hashers.clear)
+        self.course, = self.create_courses(1)
+        self.client = self.jwt_client(self.teacher)
+
+    def create_upload(self):
+        response = self.client.post('/api/material-uploads/', {
+            'course': self.course.pk, 'title': 'Apostila', 'filename': 'apostila.txt', 'total_size': len(self.CONTENT),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.json()['id']
+
+    def put_chunk(self, upload_id, index, data=None):
+        if data is None:
+            data = self.CONTENT[index * 4:(index + 1) * 4]
+        return self.client.put(f'/api/material-uploads/{upload_id}/chunks/{index}/', data,
+                               content_type='application/octet-stream')
+
+    def complete(self, upload_id, sha256=None):
+        return self.client.post(f'/api/material-uploads/{upload_id}/complete/',
+                                {'sha256': sha256} if sha256 else {}, format='json')
+
+    def test_out_of_order_and_wrong_size_chunks_are_rejected(self):
+        upload_id = self.create_upload()
+        self.assertEqual(self.put_chunk(upload_id, 1).status_code, 409)
+        self.assertEqual(self.put_chunk(upload_id, 0, b'abc').status_code, 400)
+        self.assertEqual(self.put_chunk(upload_id, 0).json()['received_chunks'], 1)
+        self.assertEqual(MaterialUpload.objects.get(pk=upload_id).received_bytes, 4)
+
+    def test_resume_after_lost_hash_state(self):
+        upload_id = self.create_upload()
+        for index in range(2):
+            self.put_chunk(upload_id, index)
+        # Reenvio de parte já recebida não muda nada
+        self.assertEqual(self.put_chunk(upload_id, 1, b'xxxx').json()['received_bytes'], 8)
+        # As próximas partes chegam a outro worker, sem o estado do hash
+        uploads._hashers.clear()
+        self.assertEqual(self.client.get(f'/api/material-uploads/{upload_id}/').json()['received_chunks'], 2)
+        for index in range(2, 5):
+            self.assertEqual(self.put_chunk(upload_id, index).status_code, 200)
+        response = self.complete(upload_id, hashlib.sha256(self.CONTENT).hexdigest())
+        self.assertEqual(response.status_code, 201, response.data)
+        with Material.objects.get(pk=response.json()['id']).file.open('rb') as file:
+            self.assertEqual(file.read(), self.CONTENT)
+
+    def test_complete(self):
+        upload_id = self.create_upload()
+        self.put_chunk(upload_id, 0)
+        self.assertEqual(self.complete(upload_id).status_code, 400)
+        for index in range(1, 5):
+            self.put_chunk(upload_id, index)
+        response = self.complete(upload_id, 'f' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['sha256'], hashlib.sha256(self.CONTENT).hexdigest())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.json()['sha256'], hashlib.sha256(self.CONTENT).hexdigest())
+        self.assertFalse(MaterialUpload.objects.filter(pk=upload_id).exists())
+        self.assertFalse(os.path.exists(uploads._part_path(upload_id)))
+        self.assertFalse(uploads._hashers)
+        # Conclusão repetida não cria outro Material
+        self.assertEqual(self.complete(upload_id).status_code, 404)
+        self.assertEqual(Material.objects.filter(title='Apostila').count(), 1)
+
+    def test_hash_state_is_bounded(self):
+        with mock.patch.object(uploads, 'MAX_HASHERS', 2):
+            upload_ids = [self.create_upload() for _ in range(3)]
+        self.assertEqual([str(upload_id) for upload_id in uploads._hashers], upload_ids[1:])
+
+    def test_cleanup_removes_abandoned_uploads_and_orphan_parts(self):
+        abandoned, active = self.create_upload(), self.create_upload()
+        self.put_chunk(active, 0)
+        orphan = uploads._part_path('00000000-0000-0000-0000-000000000000')
+        open(orphan, 'wb').close()
+        old = time.time() - 7200
+        MaterialUpload.objects.filter(pk__in=[abandoned, active]).update(created_at=timezone.now() - timedelta(hours=2))
+        for path in (uploads._part_path(abandoned), orphan):
+            os.utime(path, (old, old))
+
+        call_command('cleanup_uploads', max_age=3600, stdout=io.StringIO())
+        self.assertFalse(MaterialUpload.objects.filter(pk=abandoned).exists())
+        self.assertFalse(os.path.exists(uploads._part_path(abandoned)))
+        self.assertFalse(os.path.exists(orphan))
+        # O outro recebeu parte recentemente
+        self.assertTrue(MaterialUpload.objects.filter(pk=active).exists())
+        self.assertTrue(os.path.exists(uploads._part_path(active)))
+
+
+class MaterialDownloadTests(APITestCase):
+    CONTENT = b'0123456789'
+
+    def setUp(self):
+        super().setUp()
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings = override_settings(MEDIA_ROOT=media)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.course, = self.create_courses(1)
+        self.material = self.create_material(self.CONTENT)
+        self.client = self.jwt_client(self.student)
+
+    def create_material(self, content):
+        return Material.objects.create(title='m', course=self.course, owner=self.teacher,
+                                       file=ContentFile(content, name='m.txt'))
+
+    def download(self, material=None, **headers):
+        return self.client.get(f'/api/materials/{(material or self.material).pk}/download/', headers=headers)
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_full_download(self):
+        response = self.download()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), self.CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['ETag'])
+
+    def test_range(self):
+        response = self.download(Range='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.content(response), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(response['Content-Length'], '4')
+        response = self.download(Range='bytes=-3')
+        self.assertEqual((response.status_code, self.content(response)), (206, b'789'))
+        self.assertEqual(response['Content-Range'], 'bytes 7-9/10')
+
+    def test_multiple_ranges_and_unknown_units_get_full_file(self):
+        for header in ('bytes=0-1,4-5', 'items=0-1'):
+            response = self.download(Range=header)
+            self.assertEqual((response.status_code, self.content(response)), (200, self.CONTENT))
+
+    def test_unsatisfiable_range(self):
+        for header in ('bytes=10-', 'bytes=-0', 'bytes=5-2'):
+            response = self.download(Range=header)
+            self.assertEqual(response.status_code, 416, header)
+            self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_range_on_empty_file_is_ignored(self):
+        empty = self.create_material(b'')
+        for header in ('bytes=-5', 'bytes=0-'):
+            response = self.download(empty, Range=header)
+            self.assertEqual((response.status_code, self.content(response)), (200, b''))
+            self.assertNotIn('Content-Range', response)
+
+    def test_if_range(self):
+        etag, last_modified = self.download()['ETag'], self.download()['Last-Modified']
+        self.assertEqual(self.download(Range='bytes=0-1', **{'If-Range': etag}).status_code, 206)
+        self.assertEqual(self.download(Range='bytes=0-1', **{'If-Range': last_modified}).status_code, 206)
+        # Validador antigo: o arquivo mudou, vai inteiro
+        response = self.download(Range='bytes=0-1', **{'If-Range': '"outro"'})
+        self.assertEqual((response.status_code, self.content(response)), (200, self.CONTENT))
+        old = http_date(time.time() - 3600 * 24 * 365)
+        self.assertEqual(self.download(Range='bytes=0-1', **{'If-Range': old}).status_code, 200)
+
+    def test_not_modified_keeps_validators(self):
+        first = self.download()
+        for headers in ({'If-None-Match': first['ETag']}, {'If-Modified-Since': first['Last-Modified']}):
+            response = self.download(**headers)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], first['ETag'])
+            self.assertEqual(response['Last-Modified'], first['Last-Modified'])
+
+    def test_async_range(self):
+        response = self.client.get(f'/api/async/materials/{self.material.pk}/download/', headers={'Range': 'bytes=3-'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 3-9/10')
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.course, self.other_course = self.create_courses(2)
+        self.course.name = 'Biologia vegetal'
+        self.course.description = 'Fotossíntese e respiração celular'
+        self.course.save()
+        self.material = self.course.materials.first()
+        self.material.description = 'Apostila de fotossíntese'
+        self.material.save()
+        self.quiz = self.course.quizzes.first()
+        self.question = self.quiz.questions.first()
+        self.question.text = 'Qual organela realiza a fotossíntese?'
+        self.question.option_a = 'Cloroplasto'
+        self.question.save()
+        self.client = self.jwt_client(self.student)
+
+    def search(self, q, **params):
+        response = self.client.get('/api/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['results']
+
+    def found(self, q, **params):
+        return {(result['type'], result['id']) for result in self.search(q, **params)}
+
+    def test_indexes_courses_materials_and_questions(self):
+        self.assertEqual(self.found('fotossintese'), {
+            ('course', self.course.pk), ('material', self.material.pk), ('question', self.question.pk),
+        })
+        # Título pesa mais que o corpo; o último termo casa como prefixo
+        results = self.search('fotoss', type='question,material')
+        self.assertEqual([result['type'] for result in results], ['question', 'material'])
+        self.assertEqual((results[0]['course'], results[0]['quiz']), (self.course.pk, self.quiz.pk))
+        self.assertEqual(results[1]['snippet'], 'Apostila de <mark>fotossíntese</mark>')
+        self.assertEqual(self.found('cloroplasto'), {('question', self.question.pk)})
+        self.assertEqual(self.found('fotossintese', course=self.other_course.pk), set())
+
+    def test_signals_keep_index_current(self):
+        self.course.name = 'Botânica'
+        self.course.save()
+        self.assertIn(('course', self.course.pk), self.found('botanica'))
+        self.assertNotIn(('course', self.course.pk), self.found('biologia'))
+
+        self.quiz.course = self.other_course
+        self.quiz.save()
+        self.assertEqual(self.found('cloroplasto', course=self.other_course.pk), {('question', self.question.pk)})
+
+        self.material.delete()
+        self.question.delete()
+        self.assertEqual(self.found('fotossintese'), {('course', self.course.pk)})
+
+    def test_rebuild_search_index(self):
+        expected = self.found('fotossintese')
+        SearchDocument.objects.all().delete()
+        self.assertEqual(self.found('fotossintese'), set())
+        output = io.StringIO()
+        call_command('rebuild_search_index', batch_size=2, stdout=output)
+        total = Course.objects.count() + Material.objects.count() + Question.objects.count()
+        self.assertEqual(SearchDocument.objects.count(), total)
+        self.assertIn(f'{total} documentos', output.getvalue())
+        self.assertEqual(self.found('fotossintese'), expected)
+
+    def test_like_fallback_without_fts5(self):
+        self.assertTrue(search.sqlite_fts_available(connections['default']))
+        with mock.patch.dict(search._sqlite_fts, {'default': False}), \
+                mock.patch.object(search, '_search_sqlite', side_effect=AssertionError('FTS5 usado')):
+            results = self.search('Cloroplasto')
+            self.assertEqual([(result['type'], result['id'], result['rank']) for result in results],
+                             [('question', self.question.pk, 0.0)])
+            self.assertEqual(self.found('fotossíntese', type='course'), {('course', self.course.pk)})
+            self.assertEqual(self.found('fotossíntese', course=self.other_course.pk), set())
+
+    def test_query_without_terms_is_rejected(self):
+        self.assertEqual(self.client.get('/api/search/', {'q': '  ?!'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'x', 'type': 'quiz'}).status_code, 400)
+
+
+@skipUnless(analytics.is_available(), 'numpy não está instalado')
+class ItemAnalysisTests(APITestCase):
+    def test_matches_hand_computed_fixture(self):
+        course, = self.create_courses(1, questions=4)
+        quiz = course.quizzes.order_by('pk').first()
+        q1, q2, q3, q4 = quiz.questions.order_by('pk')  # gabarito A, B, C, D
+        rows = [
+            ('A', 'B', 'C', 'D'),   # acertos 1 1 1 1
+            ('A', 'B', 'D', 'D'),   # 1 1 0 1
+            ('A', 'C', 'C', 'D'),   # 1 0 1 1
+            ('B', 'D', None, 'D'),  # 0 0 - 1 (q3 em branco)
+        ]
+        for i, options in enumerate(rows):
+            answers = {str(q.pk): option for q, option in zip((q1, q2, q3, q4), options) if option}
+            Submission.objects.create(quiz=quiz, student=User.objects.create_user(f'a{i}'), answers=answers)
+
+        response = self.jwt_client(self.teacher).get(f'/api/quizzes/{quiz.pk}/item-analysis/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['submissions'], 4)
+        items = {item['question']: item for item in data['questions']}
+
+        # Dificuldade (p): proporção de acertos
+        self.assertEqual([items[q.pk]['p_value'] for q in (q1, q2, q3, q4)], [0.75, 0.5, 0.5, 1.0])
+        # Discriminação item-resto, calculada à mão:
+        # q1: x=[1,1,1,0], resto=[3,2,2,1] -> Σxy=1, Σx²=0.75, Σy²=2 -> 1/√1.5
+        # q2: x=[1,1,0,0], resto=[3,2,3,1] -> Σxy=0.5, Σx²=1, Σy²=2.75 -> 0.5/√2.75
+        # q3: x=[1,0,1,0], resto=[3,3,2,1] -> idem q2
+        # q4: todos acertam, sem variância -> indefinida
+        self.assertEqual(items[q1.pk]['point_biserial'], round(1 / 1.5 ** 0.5, 4))
+        self.assertEqual(items[q2.pk]['point_biserial'], round(0.5 / 2.75 ** 0.5, 4))
+        self.assertEqual(items[q3.pk]['point_biserial'], round(0.5 / 2.75 ** 0.5, 4))
+        self.assertIsNone(items[q4.pk]['point_biserial'])
+
+        self.assertEqual(items[q1.pk]['options'], {'A': 3, 'B': 1, 'C': 0, 'D': 0, 'blank': 0})
+        self.assertEqual(items[q2.pk]['options'], {'A': 0, 'B': 2, 'C': 1, 'D': 1, 'blank': 0})
+        self.assertEqual(items[q3.pk]['options'], {'A': 0, 'B': 0, 'C': 2, 'D': 1, 'blank': 1})
+        self.assertEqual(items[q3.pk]['correct_option'], 'C')
+
+    def test_quiz_without_submissions(self):
+        course, = self.create_courses(1, questions=2)
+        quiz = course.quizzes.first()
+        data = self.jwt_client(self.teacher).get(f'/api/quizzes/{quiz.pk}/item-analysis/').json()
+        self.assertEqual(data['submissions'], 0)
+        self.assertEqual({(item['p_value'], item['point_biserial']) for item in data['questions']}, {(None, None)})
+
+
+class RolesCacheTests(APITestCase):
+    def course_payload(self):
+        return {'name': 'Novo', 'description': 'd'}
+
+    def test_group_change_is_reflected_immediately(self):
+        client = APIClient()
+        client.force_login(self.teacher)
+        self.assertEqual(client.post('/api/courses/', self.course_payload(), format='json').status_code, 201)
+        self.assertEqual(get_roles(User.objects.get(pk=self.teacher.pk)), {'professor'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.teacher.groups.clear()
+        self.assertEqual(get_roles(User.objects.get(pk=self.teacher.pk)), frozenset())
+        self.assertEqual(client.post('/api/courses/', self.course_payload(), format='json').status_code, 403)
+
+        # Mudança pelo lado do grupo
+        with self.captureOnCommitCallbacks(execute=True):
+            Group.objects.get(name='professor').user_set.add(self.teacher)
+        self.assertEqual(client.post('/api/courses/', self.course_payload(), format='json').status_code, 201)
+
+    def test_roles_cached_before_commit_are_discarded(self):
+        get_roles(User.objects.get(pk=self.student.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.groups.add(Group.objects.get(name='professor'))
+            # Leitura concorrente que ainda via os grupos antigos regrava o cache
+            caches['default'].set(_roles_cache_key(self.student.pk), frozenset({'aluno'}))
+        self.assertEqual(get_roles(User.objects.get(pk=self.student.pk)), {'aluno', 'professor'})
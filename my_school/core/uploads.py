@@ -0,0 +1,168 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MaterialUpload
+
+COPY_BLOCK_SIZE = 64 * 1024
+PART_SUFFIX = '.part'
+
+# Estado do SHA-256 por upload: (bytes já processados, hasher). É só um
+# atalho local ao processo que recebeu as partes: vale apenas se o offset
+# bate com received_bytes, senão (parte recebida ou upload concluído por
+# outro worker) o hash é recalculado a partir do arquivo. Guarda no máximo
+# MAX_HASHERS uploads, descartando os mais antigos (ex.: abandonados).
+MAX_HASHERS = 64
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+class PartFile(File):
+    """Arquivo já montado em disco; o FileSystemStorage o move em vez de copiar"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def _part_path(upload_id):
+    return os.path.join(settings.MATERIAL_UPLOAD_TEMP_DIR, f'{upload_id}{PART_SUFFIX}')
+
+
+def part_path(upload):
+    return _part_path(upload.pk)
+
+
+def _get_state(upload_id):
+    with _hashers_lock:
+        return _hashers.get(upload_id)
+
+
+def _set_state(upload_id, state):
+    with _hashers_lock:
+        if state is None:
+            _hashers.pop(upload_id, None)
+            return
+        _hashers[upload_id] = state
+        _hashers.move_to_end(upload_id)
+        while len(_hashers) > MAX_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def start(upload):
+    os.makedirs(settings.MATERIAL_UPLOAD_TEMP_DIR, exist_ok=True)
+    open(part_path(upload), 'wb').close()
+    _set_state(upload.pk, (0, hashlib.sha256()))
+
+
+def write_chunk(upload, stream, length):
+    """Grava a próxima parte na posição `received_bytes` do arquivo parcial.
+
+    Se a transferência falhar no meio, nada é confirmado e a mesma parte pode
+    ser reenviada, sobrescrevendo o trecho.
+    """
+    offset = upload.received_bytes
+    state = _get_state(upload.pk)
+    hasher = state[1].copy() if state and state[0] == offset else None
+
+    written = 0
+    with open(part_path(upload), 'r+b') as part:
+        part.seek(offset)
+        while written < length:
+            block = stream.read(min(COPY_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            part.write(block)
+            if hasher:
+                hasher.update(block)
+            written += len(block)
+    if written != length:
+        raise ValueError('parte incompleta')
+
+    _set_state(upload.pk, (offset + length, hasher) if hasher else None)
+
+
+def checksum(upload):
+    """SHA-256 do arquivo montado, relendo o disco só se o estado incremental se perdeu"""
+    state = _get_state(upload.pk)
+    if state and state[0] == upload.received_bytes:
+        return state[1].hexdigest()
+    hasher = hashlib.sha256()
+    with open(part_path(upload), 'rb') as part:
+        for block in iter(lambda: part.read(COPY_BLOCK_SIZE), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def open_part(upload, sha256=None):
+    part = PartFile(open(part_path(upload), 'rb'), name=upload.filename)
+    # Evita que o storage deduplicado recalcule o hash
+    part.sha256 = sha256
+    return part
+
+
+def discard(upload_id):
+    """Remove o arquivo parcial e o estado do hash (recebe o id: o delete() zera o pk)"""
+    _set_state(upload_id, None)
+    try:
+        os.remove(_part_path(upload_id))
+    except FileNotFoundError:
+        pass
+
+
+def _last_activity(upload):
+    # Cada parte gravada atualiza o mtime do arquivo parcial
+    try:
+        return os.path.getmtime(part_path(upload))
+    except FileNotFoundError:
+        return upload.created_at.timestamp()
+
+
+def cleanup(max_age):
+    """Apaga uploads sem partes novas há `max_age` segundos e arquivos .part órfãos.
+
+    Devolve (uploads, arquivos) removidos. Cada upload é travado e conferido
+    de novo antes de apagar, para não disputar com uma parte em andamento.
+    """
+    cutoff = time.time() - max_age
+    stale = MaterialUpload.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=max_age))
+    removed_uploads = 0
+    for upload_id in stale.values_list('pk', flat=True).iterator():
+        with transaction.atomic():
+            upload = MaterialUpload.objects.select_for_update().filter(pk=upload_id).first()
+            if upload is None or _last_activity(upload) >= cutoff:
+                continue
+            upload.delete()
+        discard(upload_id)
+        removed_uploads += 1
+
+    # Partes sem upload: conclusão ou remoção interrompida antes do discard
+    orphans = {}
+    try:
+        names = os.listdir(settings.MATERIAL_UPLOAD_TEMP_DIR)
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        stem, ext = os.path.splitext(name)
+        try:
+            upload_id = uuid.UUID(stem)
+        except ValueError:
+            continue
+        try:
+            if ext == PART_SUFFIX and os.path.getmtime(_part_path(upload_id)) < cutoff:
+                orphans[upload_id] = name
+        except FileNotFoundError:
+            pass
+    for upload_id in MaterialUpload.objects.filter(pk__in=list(orphans)).values_list('pk', flat=True):
+        del orphans[upload_id]
+    for upload_id in orphans:
+        discard(upload_id)
+    return removed_uploads, len(orphans)
@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_nested.routers import NestedDefaultRouter
+from . import async_views
 from .views import (
     UserViewSet, GroupViewSet, CourseViewSet, MaterialViewSet,
-    QuizViewSet, QuestionViewSet, SubmissionViewSet
+    MaterialUploadViewSet, QuizViewSet, QuestionViewSet, SubmissionViewSet, SearchViewSet
 )
 
 router = DefaultRouter()
@@ -11,14 +12,28 @@ router.register(r'users', UserViewSet, basename='user')
 router.register(r'groups', GroupViewSet, basename='group')
 router.register(r'courses', CourseViewSet, basename='course')
 router.register(r'materials', MaterialViewSet, basename='material')
+router.register(r'material-uploads', MaterialUploadViewSet, basename='material-upload')
 router.register(r'quizzes', QuizViewSet, basename='quiz')
 router.register(r'questions', QuestionViewSet, basename='question')
 router.register(r'submissions', SubmissionViewSet, basename='submission')
+router.register(r'search', SearchViewSet, basename='search')
 
 quiz_router = NestedDefaultRouter(router, r'quizzes', lookup='quiz')
 quiz_router.register(r'questions', QuestionViewSet, basename='quiz-questions')
 
+# Leituras assíncronas (ASGI), com a mesma saída das rotas acima
+async_urlpatterns = [
+    path('courses/', async_views.CourseListView.as_view(), name='async-course-list'),
+    path('courses/<int:pk>/', async_views.CourseDetailView.as_view(), name='async-course-detail'),
+    path('quizzes/', async_views.QuizListView.as_view(), name='async-quiz-list'),
+    path('quizzes/<int:pk>/', async_views.QuizDetailView.as_view(), name='async-quiz-detail'),
+    path('materials/', async_views.MaterialListView.as_view(), name='async-material-list'),
+    path('materials/<int:pk>/', async_views.MaterialDetailView.as_view(), name='async-material-detail'),
+    path('materials/<int:pk>/download/', async_views.MaterialDownloadView.as_view(), name='async-material-download'),
+]
+
 urlpatterns = [
     path('api/', include(router.urls)),
     path('api/', include(quiz_router.urls)),
+    path('api/async/', include(async_urlpatterns)),
 ] 
\ No newline at end of file
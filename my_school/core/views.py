@@ -1,28 +1,61 @@
+import os
+
 from rest_framework import permissions
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
 from django.contrib.auth.models import User, Group
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from .serializers import UserSerializer, GroupSerializer
-from .models import Course, Material, Quiz, Question, Submission
+from .models import Course, Material, MaterialUpload, Quiz, QuizStats, Question, SearchDocument, Submission
 from .serializers import CourseSerializer, MaterialSerializer, QuizSerializer, QuestionSerializer, SubmissionSerializer
+from .serializers import MaterialUploadSerializer
+from .serializers import CourseSummarySerializer, QuizSummarySerializer, SubmissionBulkItemSerializer
+from .serializers import QuizStatsSerializer, QuizQuestionSerializer
+from .sparse import SparseFieldsMixin
+from .roles import has_role
+from .downloads import serve_file
+from .gradebook import FORMATS as GRADEBOOK_FORMATS, gradebook_response, parquet_available
+from .response_cache import USERS_SCOPE, CachedResponseMixin
+from .conditional import ConditionalGetMixin
+from .replicas import ReplicaReadMixin
+from .fastpath import FastReadMixin
+from . import fastpath
+from . import uploads
+from .grading import get_answer_key, get_answer_keys, grade
+from . import stats as quiz_stats
+from . import analytics
+from . import answer_rows
+from . import search
+from . import question_bank
+from . import jobs
+from . import tasks
 
 
 class IsTeacher(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user and request.user.groups.filter(name='professor').exists()
+        return has_role(request.user, 'professor')
 
 
 class IsStudent(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user and request.user.groups.filter(name='aluno').exists()
+        return has_role(request.user, 'aluno')
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
+    ordering = 'id'
+    sparse_actions = ('list', 'retrieve', 'me')
+
+    def get_queryset(self):
+        return self.get_optimized_queryset(User.objects.all())
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
@@ -60,31 +93,111 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response({'detail': f'Grupo {group_name} não encontrado'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin, SparseFieldsMixin, FastReadMixin,
+                    viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['teacher']
+    ordering = '-created_at'
+
+    def get_cache_scopes(self):
+        if self.action == 'retrieve':
+            return [f"course:{self.kwargs['pk']}", USERS_SCOPE]
+        return ['courses', USERS_SCOPE]
+
+    def get_etag_querysets(self):
+        if self.action == 'retrieve':
+            pk = self.kwargs['pk']
+            return [Course.objects.filter(pk=pk), Material.objects.filter(course_id=pk),
+                    Quiz.objects.filter(course_id=pk), Question.objects.filter(quiz__course_id=pk)]
+        # A listagem mostra as contagens de materiais e quizzes
+        return [self.filter_queryset(Course.objects.all()), Material.objects.all(), Quiz.objects.all()]
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return CourseSummarySerializer
+        return CourseSerializer
+
+    def get_base_queryset(self):
+        queryset = Course.objects.all()
+        if self.action == 'list':
+            # Contagens fora de ?fields= não são calculadas
+            if self.wants('materials_count'):
+                queryset = queryset.annotate(materials_count=Count('materials', distinct=True))
+            if self.wants('quizzes_count'):
+                queryset = queryset.annotate(quizzes_count=Count('quizzes', distinct=True))
+        return queryset
+
+    def get_queryset(self):
+        # Carrega professor, materiais, quizzes e questões em número fixo de queries
+        return self.get_optimized_queryset(self.get_base_queryset())
+
+    def get_fast_queryset(self):
+        fields = ['id', 'name', 'description', 'teacher_id', 'created_at']
+        if self.action == 'list':
+            # Só as contagens anotadas por get_base_queryset
+            fields += [name for name in ('materials_count', 'quizzes_count') if self.wants(name)]
+        return self.get_base_queryset().values(*fields)
+
+    def fast_represent(self, rows):
+        if self.action == 'list':
+            return fastpath.course_list(rows)
+        return fastpath.course_detail(rows, self.request)
 
     def perform_create(self, serializer):
         serializer.save(teacher=self.request.user)
 
+    @action(detail=True, methods=['get'])
+    def gradebook(self, request, pk=None):
+        """Notas do curso (alunos × quizzes) em streaming; ?output=csv (padrão) ou parquet"""
+        course = get_object_or_404(Course.objects.all(), pk=pk)
+        if course.teacher_id != request.user.pk and not request.user.is_staff:
+            return Response({'detail': 'apenas o professor do curso pode exportar as notas'}, status=status.HTTP_403_FORBIDDEN)
+        output = request.query_params.get('output', 'csv')
+        if output not in GRADEBOOK_FORMATS:
+            return Response({'detail': f"formato inválido; use {' ou '.join(GRADEBOOK_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        if output == 'parquet' and not parquet_available():
+            return Response({'detail': 'exportação em parquet indisponível: pyarrow não está instalado'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return gradebook_response(course, output)
+
     def get_permissions(self):
         if self.action in ['create','update','partial_update','destroy']:
             return [IsTeacher()]
+        if self.action == 'gradebook':
+            return [(IsTeacher | permissions.IsAdminUser)()]
         return [permissions.IsAuthenticated()]
 
 
-class MaterialViewSet(viewsets.ModelViewSet):
+class MaterialViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Material.objects.all()
     serializer_class = MaterialSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['course']
+    ordering = '-uploaded_at'
+
+    def get_queryset(self):
+        if self.action == 'download':
+            return Material.objects.all()
+        return self.get_optimized_queryset(Material.objects.all())
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Envia o arquivo do material em blocos (suporta Range e GET condicional)"""
+        material = self.get_object()
+        if not material.file:
+            return Response({'detail': 'material sem arquivo'}, status=status.HTTP_404_NOT_FOUND)
+        # O nome no storage é o hash do conteúdo; o download usa o título
+        ext = os.path.splitext(material.file.name)[1]
+        return serve_file(request, material.file, filename=f'{material.title}{ext}')
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        with transaction.atomic():
+            material = serializer.save(owner=self.request.user)
+            if material.file:
+                tasks.enqueue(jobs.extract_material_text, material.pk)
 
     def get_permissions(self):
         if self.action in ['create','update','partial_update','destroy']:
@@ -92,23 +205,197 @@ class MaterialViewSet(viewsets.ModelViewSet):
         return [permissions.IsAuthenticated()]
 
 
-class QuizViewSet(viewsets.ModelViewSet):
+class MaterialUploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                            mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """Upload de material em partes: criar, enviar as partes em ordem e concluir.
+
+    Se a conexão cair, o cliente consulta o upload e continua a partir de
+    `received_chunks`.
+    """
+    serializer_class = MaterialUploadSerializer
+    permission_classes = [IsTeacher]
+
+    def get_queryset(self):
+        return MaterialUpload.objects.filter(owner_id=self.request.user.pk)
+
+    def perform_create(self, serializer):
+        upload = serializer.save(owner=self.request.user, chunk_size=settings.MATERIAL_UPLOAD_CHUNK_SIZE)
+        uploads.start(upload)
+
+    def perform_destroy(self, instance):
+        upload_id = instance.pk
+        instance.delete()
+        uploads.discard(upload_id)
+
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<index>\d+)')
+    def chunk(self, request, pk=None, index=None):
+        """Recebe a parte `index` (corpo cru da requisição)"""
+        with transaction.atomic():
+            upload = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            index = int(index)
+            if index < upload.received_chunks:
+                # Parte já recebida (reenvio após timeout, por exemplo)
+                return Response(self.get_serializer(upload).data)
+            if index > upload.received_chunks:
+                return Response({'detail': f'parte esperada: {upload.received_chunks}'}, status=status.HTTP_409_CONFLICT)
+
+            expected = min(upload.chunk_size, upload.total_size - upload.received_bytes)
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+            if length != expected:
+                return Response({'detail': f'a parte {index} deve ter {expected} bytes'}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                uploads.write_chunk(upload, request.stream, length)
+            except ValueError as exc:
+                return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            upload.received_bytes += length
+            upload.save(update_fields=['received_bytes'])
+        return Response(self.get_serializer(upload).data)
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """Confere o arquivo montado e cria o Material"""
+        with transaction.atomic():
+            # Trava o upload: conclusões simultâneas não criam dois Materials
+            upload = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            if upload.received_bytes != upload.total_size:
+                return Response({'detail': f'faltam partes: recebidas {upload.received_chunks} de {upload.total_chunks}'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            digest = uploads.checksum(upload)
+            expected = request.data.get('sha256')
+            if expected and expected.lower() != digest:
+                return Response({'detail': 'sha256 não confere', 'sha256': digest}, status=status.HTTP_400_BAD_REQUEST)
+
+            material = Material(title=upload.title, description=upload.description,
+                                course=upload.course, owner=upload.owner)
+            with uploads.open_part(upload, sha256=digest) as part:
+                material.file.save(upload.filename, part, save=False)
+            material.save()
+            upload_id = upload.pk
+            upload.delete()
+            tasks.enqueue(jobs.extract_material_text, material.pk)
+        uploads.discard(upload_id)
+        data = MaterialSerializer(material, context=self.get_serializer_context()).data
+        data['sha256'] = digest
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+class QuizViewSet(ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin, SparseFieldsMixin, FastReadMixin,
+                  viewsets.ModelViewSet):
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = '-created_at'
+    cache_actions = ('retrieve',)
+
+    def get_cache_scopes(self):
+        return [f"quiz:{self.kwargs['pk']}", USERS_SCOPE]
+
+    def get_etag_querysets(self):
+        if self.action == 'retrieve':
+            pk = self.kwargs['pk']
+            return [Quiz.objects.filter(pk=pk), Question.objects.filter(quiz_id=pk)]
+        # A listagem mostra a contagem de questões
+        return [Quiz.objects.all(), Question.objects.all()]
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return QuizSummarySerializer
+        return QuizSerializer
+
+    def get_base_queryset(self):
+        queryset = Quiz.objects.all()
+        if self.action == 'list' and self.wants('questions_count'):
+            queryset = queryset.annotate(questions_count=Count('questions'))
+        return queryset
+
+    def get_queryset(self):
+        return self.get_optimized_queryset(self.get_base_queryset())
+
+    def get_fast_queryset(self):
+        fields = list(fastpath.QUIZ_FIELDS)
+        if self.action == 'list' and self.wants('questions_count'):
+            fields.append('questions_count')
+        return self.get_base_queryset().values(*fields)
+
+    def fast_represent(self, rows):
+        if self.action == 'list':
+            return fastpath.quiz_list(rows)
+        return fastpath.quiz_detail(rows)
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    @action(detail=True, methods=['get'])
+    def stats(self, request, pk=None):
+        """Estatísticas agregadas do quiz, lidas de uma única linha de QuizStats.
+
+        Só leitura: o que o worker ainda não contou é somado em memória.
+        """
+        stats = QuizStats.objects.filter(quiz_id=pk).first()
+        if stats is None:
+            # Ainda sem agregado (ou invalidado): calcula sem gravar
+            quiz = get_object_or_404(Quiz.objects.all(), pk=pk)
+            stats = quiz_stats.current(quiz.pk)
+        elif quiz_stats.has_pending(stats.quiz_id):
+            # O worker ainda não processou as últimas submissões
+            stats = quiz_stats.current(stats.quiz_id, stats)
+        return Response(QuizStatsSerializer(stats).data)
+
+    @action(detail=True, methods=['post'], url_path='questions/import')
+    def import_questions(self, request, pk=None):
+        """Importa um banco de questões (arquivo .csv/.json em `file` ou lista JSON) de uma vez.
+
+        Todas as linhas são validadas antes de gravar; com qualquer erro nada é gravado.
+        """
+        quiz = get_object_or_404(Quiz.objects.only('pk', 'course_id'), pk=pk)
+        upload = request.FILES.get('file')
+        if upload is not None:
+            try:
+                items = question_bank.read_file(upload)
+            except question_bank.QuestionFileError as exc:
+                return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        elif isinstance(request.data, list):
+            items = request.data
+        else:
+            return Response({'detail': 'envie um arquivo em file ou uma lista de questões'}, status=status.HTTP_400_BAD_REQUEST)
+        if not items:
+            return Response({'detail': 'nenhuma questão para importar'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > question_bank.MAX_QUESTIONS:
+            return Response({'detail': f'máximo de {question_bank.MAX_QUESTIONS} questões por importação'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = QuizQuestionSerializer(data=items, many=True)
+        if not serializer.is_valid():
+            errors = serializer.errors
+            # Conforme a versão do DRF, os erros vêm em lista ou em dict por índice
+            items_errors = errors.items() if isinstance(errors, dict) else enumerate(errors)
+            errors = [{'index': index, 'errors': item_errors} for index, item_errors in items_errors if item_errors]
+            return Response({'detail': 'questões inválidas; nada foi importado', 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            questions = question_bank.create_questions(quiz, serializer.validated_data)
+        return Response({'created': len(questions), 'questions': QuizQuestionSerializer(questions, many=True).data},
+                        status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'], url_path='item-analysis')
+    def item_analysis(self, request, pk=None):
+        """Dificuldade, discriminação e distribuição das opções de cada questão"""
+        if not analytics.is_available():
+            return Response({'detail': 'análise indisponível: numpy não está instalado'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        quiz = get_object_or_404(Quiz.objects.all(), pk=pk)
+        return Response(analytics.item_analysis(quiz.pk))
+
     def get_permissions(self):
-        if self.action in ['create','update','partial_update','destroy']:
+        if self.action in ['create','update','partial_update','destroy', 'import_questions']:
             return [IsTeacher()]
+        if self.action in ['stats', 'item_analysis']:
+            return [(IsTeacher | permissions.IsAdminUser)()]
         return [permissions.IsAuthenticated()]
 
 
-class QuestionViewSet(viewsets.ModelViewSet):
+class QuestionViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseFieldsMixin, viewsets.ModelViewSet):
+    queryset = Question.objects.all()
     serializer_class = QuestionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = 'id'
 
     def get_queryset(self):
         quiz_pk = self.kwargs.get('quiz_pk')
@@ -116,10 +403,22 @@ class QuestionViewSet(viewsets.ModelViewSet):
             return Question.objects.filter(quiz_id=quiz_pk)
         return Question.objects.all()
 
+    def get_etag_querysets(self):
+        if self.action == 'retrieve':
+            return [self.get_queryset().filter(pk=self.kwargs['pk'])]
+        return [self.get_queryset()]
+
+    def get_serializer_class(self):
+        # Na rota aninhada o quiz vem da URL, não do corpo
+        if self.kwargs.get('quiz_pk'):
+            return QuizQuestionSerializer
+        return QuestionSerializer
+
     def perform_create(self, serializer):
         quiz_pk = self.kwargs.get('quiz_pk')
         if quiz_pk:
-            quiz = Quiz.objects.get(pk=quiz_pk)
+            # Uma única leitura (pk e curso), reaproveitada pelos signals da questão
+            quiz = get_object_or_404(Quiz.objects.only('pk', 'course_id'), pk=quiz_pk)
             serializer.save(quiz=quiz)
         else:
             serializer.save()
@@ -130,33 +429,191 @@ class QuestionViewSet(viewsets.ModelViewSet):
         return [permissions.IsAuthenticated()]
 
 
-class SubmissionViewSet(viewsets.ModelViewSet):
+class SubmissionViewSet(ReplicaReadMixin, ConditionalGetMixin, SparseFieldsMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = Submission.objects.all()
     serializer_class = SubmissionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = '-submitted_at'
+    BULK_MAX_ITEMS = 1000
 
     def perform_create(self, serializer):
-        submission = serializer.save(student=self.request.user)
-        # Calcula automaticamente a pontuação após criar a submissão
-        submission.calculate_score()
+        # A pontuação é calculada em memória e gravada no mesmo INSERT
+        quiz = serializer.validated_data['quiz']
+        answers = serializer.validated_data.get('answers')
+        score = grade(answers, get_answer_key(quiz.pk))
+        with transaction.atomic():
+            serializer.save(student=self.request.user, score=score)
+            self._enqueue_stats({quiz.pk})
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        """Recebe várias submissões de uma vez e grava todas com um único bulk_create.
+
+        Erros (inclusive submissão repetida para o mesmo quiz/aluno) são
+        reportados por item, sem impedir a gravação dos itens válidos.
+        """
+        if not isinstance(request.data, list) or not request.data:
+            return Response({'detail': 'envie uma lista de submissões'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.BULK_MAX_ITEMS:
+            return Response({'detail': f'máximo de {self.BULK_MAX_ITEMS} submissões por lote'}, status=status.HTTP_400_BAD_REQUEST)
+
+        errors = {}
+        items = {}
+        for index, data in enumerate(request.data):
+            item = SubmissionBulkItemSerializer(data=data)
+            if not item.is_valid():
+                errors[index] = item.errors
+                continue
+            item = item.validated_data
+            if 'student' not in item:
+                item['student'] = request.user.pk
+            elif item['student'] != request.user.pk and not request.user.is_staff:
+                errors[index] = {'student': ['apenas admins podem enviar por outros alunos']}
+                continue
+            items[index] = item
+
+        quiz_ids = Quiz.objects.filter(pk__in={item['quiz'] for item in items.values()}).values_list('pk', flat=True)
+        student_ids = User.objects.filter(pk__in={item['student'] for item in items.values()}).values_list('pk', flat=True)
+        quiz_ids, student_ids = set(quiz_ids), set(student_ids)
+        for index, item in list(items.items()):
+            if item['quiz'] not in quiz_ids:
+                errors[index] = {'quiz': ['quiz não encontrado']}
+            elif item['student'] not in student_ids:
+                errors[index] = {'student': ['aluno não encontrado']}
+            else:
+                continue
+            del items[index]
+
+        created = self._bulk_insert(items, errors)
+        results = [
+            {'index': index, 'id': submission.pk, 'quiz': submission.quiz_id,
+             'student': submission.student_id, 'score': submission.score}
+            for index, submission in created
+        ]
+        errors = [{'index': index, 'errors': item_errors} for index, item_errors in sorted(errors.items())]
+        response_status = status.HTTP_201_CREATED if results else status.HTTP_400_BAD_REQUEST
+        return Response({'created': results, 'errors': errors}, status=response_status)
+
+    def _bulk_insert(self, items, errors):
+        """Descarta pares (quiz, aluno) já existentes ou repetidos no lote e grava o resto"""
+        pairs = {(item['quiz'], item['student']) for item in items.values()}
+        existing = set(
+            Submission.objects.filter(
+                quiz_id__in={quiz_id for quiz_id, _ in pairs},
+                student_id__in={student_id for _, student_id in pairs},
+            ).values_list('quiz_id', 'student_id')
+        )
+        answer_keys = get_answer_keys(quiz_id for quiz_id, _ in pairs)
+
+        pending = []
+        for index, item in sorted(items.items()):
+            pair = (item['quiz'], item['student'])
+            if pair in existing:
+                errors[index] = {'non_field_errors': ['o aluno já submeteu este quiz']}
+                continue
+            existing.add(pair)
+            score = grade(item['answers'], answer_keys[item['quiz']])
+            submission = Submission(
+                quiz_id=item['quiz'], student_id=item['student'], answers=item['answers'], score=score,
+            )
+            pending.append((index, submission))
+
+        try:
+            with transaction.atomic():
+                Submission.objects.bulk_create([submission for _, submission in pending])
+                answer_rows.write([submission for _, submission in pending])
+                self._enqueue_stats({submission.quiz_id for _, submission in pending})
+        except IntegrityError:
+            # Outra requisição gravou alguma das submissões nesse meio tempo:
+            # grava uma a uma, cada uma no seu savepoint, e reporta as que colidirem
+            # (novas corridas durante a repetição também caem aqui)
+            created = []
+            with transaction.atomic():
+                for index, submission in pending:
+                    try:
+                        with transaction.atomic():
+                            Submission.objects.bulk_create([submission])
+                    except IntegrityError:
+                        errors[index] = {'non_field_errors': ['o aluno já submeteu este quiz']}
+                    else:
+                        created.append((index, submission))
+                answer_rows.write([submission for _, submission in created])
+                self._enqueue_stats({submission.quiz_id for _, submission in created})
+            pending = created
+        return pending
+
+    def _enqueue_stats(self, quiz_ids):
+        # As estatísticas são atualizadas pelo worker (core.jobs), fora da requisição
+        for quiz_id in sorted(quiz_ids):
+            tasks.enqueue(jobs.refresh_quiz_stats, quiz_id, key=f'quiz-stats:{quiz_id}')
 
     def get_permissions(self):
-        if self.action in ['create']:
+        if self.action in ['create', 'bulk']:
             # Permite que estudantes e admins criem submissões
             return [permissions.IsAuthenticated()]
         elif self.action in ['update','partial_update','destroy']:
             return [permissions.IsAdminUser()]  # Apenas admin pode modificar submissões
         return [permissions.IsAuthenticated()]
 
-    def get_queryset(self):
+    def get_visible_submissions(self):
         # Professores e admins veem todas as submissões
-        if self.request.user.groups.filter(name='professor').exists() or self.request.user.is_staff:
+        if has_role(self.request.user, 'professor') or self.request.user.is_staff:
             return Submission.objects.all()
         # Alunos veem apenas suas próprias submissões
-        return Submission.objects.filter(student=self.request.user)
+        return Submission.objects.filter(student_id=self.request.user.pk)
+
+    def get_queryset(self):
+        return self.get_optimized_queryset(self.get_visible_submissions())
+
+    def get_fast_queryset(self):
+        return self.get_visible_submissions().values('id', 'quiz_id', 'student_id', 'submitted_at', 'answers', 'score')
+
+    def fast_represent(self, rows):
+        return fastpath.submission_list(rows)
+
+    def get_etag_querysets(self):
+        queryset = self.get_visible_submissions()
+        if self.action == 'retrieve':
+            queryset = queryset.filter(pk=self.kwargs['pk'])
+        return [queryset]
 
 
-class GroupViewSet(viewsets.ModelViewSet):
+class SearchViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    """Busca em cursos, materiais e questões, ordenada por relevância.
+
+    ?q= termos (todos obrigatórios; o último casa como prefixo), ?type=
+    course, material e/ou question separados por vírgula, ?course= id do
+    curso e ?page= página (a partir de 1).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    page_size = 20
+
+    def list(self, request):
+        query = request.query_params.get('q', '')
+        if not search.tokens(query):
+            return Response({'detail': 'informe os termos da busca em ?q='}, status=status.HTTP_400_BAD_REQUEST)
+        kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+        valid_kinds = [kind for kind, _ in SearchDocument.KIND_CHOICES]
+        if any(kind not in valid_kinds for kind in kinds):
+            return Response({'detail': f"tipo inválido; use {', '.join(valid_kinds)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            course_id = int(request.query_params['course']) if request.query_params.get('course') else None
+            page = max(int(request.query_params.get('page', 1)), 1)
+        except ValueError:
+            return Response({'detail': 'course e page devem ser números inteiros'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Um resultado a mais só para saber se há próxima página, sem COUNT(*)
+        results = search.search(query, kinds, course_id, limit=self.page_size + 1, offset=(page - 1) * self.page_size)
+        url = request.build_absolute_uri()
+        return Response({
+            'next': replace_query_param(url, 'page', page + 1) if len(results) > self.page_size else None,
+            'previous': replace_query_param(url, 'page', page - 1) if page > 1 else None,
+            'results': results[:self.page_size],
+        })
+
+
+class GroupViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = Group.objects.all()
     serializer_class = GroupSerializer
-    permission_classes = [permissions.IsAdminUser] 
\ No newline at end of file
+    permission_classes = [permissions.IsAdminUser]
+    ordering = 'id' 
\ No newline at end of file
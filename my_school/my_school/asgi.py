@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Leituras assíncronas ficam em /api/async/ (core.async_views). Para servir:
+    uvicorn my_school.asgi:application
 """
 
 import os
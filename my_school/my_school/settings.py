@@ -10,9 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,7 +50,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -56,11 +59,28 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.CoreCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
+# API_FAST_JSON=1 troca o json da stdlib por orjson (core.renderers) na
+# renderização e no parsing; a saída é a mesma
+if os.environ.get('API_FAST_JSON') == '1':
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ]
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = [
+        'core.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ]
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    'TOKEN_OBTAIN_SERIALIZER': 'core.authentication.RoleTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.authentication.RoleTokenRefreshSerializer',
 }
 
 MIDDLEWARE = [
@@ -97,11 +117,138 @@ WSGI_APPLICATION = 'my_school.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+#
+# O perfil é escolhido por DB_PROFILE, sem editar código:
+# - sqlite (padrão): WAL, busy_timeout e transações IMMEDIATE, para que
+#   submissões concorrentes esperem o lock em vez de falhar com
+#   "database is locked";
+# - postgres: conexões persistentes (DB_CONN_MAX_AGE) ou o pool nativo do
+#   Django com DB_POOL=1 (requer psycopg[pool]).
+
+DB_PROFILE = os.environ.get('DB_PROFILE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+if DB_PROFILE == 'sqlite':
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 20))  # segundos
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'timeout': SQLITE_BUSY_TIMEOUT,
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT * 1000};'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA cache_size=-20000;'
+                    'PRAGMA mmap_size=134217728;'
+                ),
+            },
+        }
     }
+elif DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'my_school'),
+            'USER': os.environ.get('DB_USER', 'my_school'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+    if os.environ.get('DB_POOL') == '1':
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            },
+        }
+        # O pool nativo não pode ser combinado com conexões persistentes
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+else:
+    raise ImproperlyConfigured(f"DB_PROFILE inválido: {DB_PROFILE!r} (use 'sqlite' ou 'postgres')")
+
+# Réplica de leitura opcional (core.replicas): list/retrieve vão à réplica e
+# escritas ao primário. Para testar localmente, DB_REPLICA_NAME pode apontar
+# para uma cópia do arquivo SQLite.
+if os.environ.get('DB_REPLICA_NAME') or os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    if DB_PROFILE == 'postgres':
+        DATABASES['replica'].update({
+            'HOST': os.environ.get('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+            'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        })
+    DATABASE_ROUTERS = ['core.replicas.PrimaryReplicaRouter']
+
+# Segundos em que o usuário lê do primário depois de uma escrita
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# 'default' guarda estado que precisa valer para todos os workers (versão dos
+# tokens, papéis, gabaritos, leitura presa ao primário). CACHE_BACKEND:
+# locmem (só para desenvolvimento, um processo), file (processos no mesmo
+# host) ou redis. Fora do DEBUG o padrão é file e locmem é recusado (core.checks).
+#
+# 'responses' guarda as respostas de cursos/quizzes (core.response_cache).
+# O backend é escolhido por RESPONSE_CACHE_BACKEND: locmem (LRU por processo,
+# só com DEBUG), file (compartilhado entre processos no mesmo host; padrão
+# fora do DEBUG) ou redis (use maxmemory-policy allkeys-lru no servidor).
+
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1000))
+
+RESPONSE_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'core-responses',
+        'OPTIONS': {'MAX_ENTRIES': RESPONSE_CACHE_MAX_ENTRIES},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'responses',
+        'OPTIONS': {'MAX_ENTRIES': RESPONSE_CACHE_MAX_ENTRIES},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'default',
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('CACHE_BACKEND', 'locmem' if DEBUG else 'file')],
+    'responses': {
+        **RESPONSE_CACHE_BACKENDS[os.environ.get('RESPONSE_CACHE_BACKEND', 'locmem' if DEBUG else 'file')],
+        'TIMEOUT': RESPONSE_CACHE_TIMEOUT,
+    },
 }
 
 
@@ -146,6 +293,45 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    # Arquivos de Material deduplicados por SHA-256
+    'materials': {
+        'BACKEND': 'core.storage.ContentAddressedStorage',
+    },
+}
+
+# Download de materiais: None (Django envia em blocos), 'x-sendfile' (Apache/lighttpd)
+# ou 'x-accel-redirect' (nginx, com location interna em MATERIAL_DOWNLOAD_ACCEL_PREFIX)
+MATERIAL_DOWNLOAD_OFFLOAD = None
+MATERIAL_DOWNLOAD_ACCEL_PREFIX = '/protected-media/'
+
+# Upload de materiais em partes (material-uploads/)
+MATERIAL_UPLOAD_TEMP_DIR = MEDIA_ROOT / 'uploads'
+MATERIAL_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+MATERIAL_UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024
+# Uploads sem partes novas há mais que isso (segundos) são apagados por
+# `manage.py cleanup_uploads`, junto com os arquivos .part órfãos
+MATERIAL_UPLOAD_EXPIRY = 24 * 60 * 60
+# Blobs reaproveitados há menos que isso (segundos) não são apagados na hora;
+# ficam para `manage.py collect_material_files`
+MATERIAL_BLOB_GRACE = 60 * 60
+
+# Grava também as respostas normalizadas (core.Answer) junto do JSON de
+# Submission.answers. Ao ativar em uma base existente, rode backfill_answers.
+SUBMISSION_ANSWER_ROWS = os.environ.get('SUBMISSION_ANSWER_ROWS', '1') == '1'
+
+# Fila de tarefas (core.tasks), executada por `manage.py run_tasks`.
+# TASKS_EAGER=1 roda as tarefas no próprio processo, após o commit
+TASKS_EAGER = os.environ.get('TASKS_EAGER', '0') == '1'
+TASKS_RETRY_DELAY = 10  # segundos; dobra a cada nova tentativa
+MATERIAL_TEXT_MAX_BYTES = 1024 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
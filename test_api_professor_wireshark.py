@@ -95,7 +95,7 @@ class ProfessorAPITester:
             self.print_request_info("GET", url, response)
             
             if response.status_code == 200:
-                users = response.json()
+                users = response.json()['results']
                 self.log(f"✅ Lista completa de usuários obtida: {len(users)} usuários")
                 self.users = users
                 for user in users:
@@ -118,7 +118,7 @@ class ProfessorAPITester:
             self.print_request_info("GET", url, response)
             
             if response.status_code == 200:
-                groups = response.json()
+                groups = response.json()['results']
                 self.log(f"✅ Lista de grupos obtida: {len(groups)} grupos")
                 for group in groups:
                     self.log(f"   - {group.get('name')} (ID: {group.get('id')})")
@@ -185,7 +185,7 @@ class ProfessorAPITester:
             self.print_request_info("GET", url, response)
             
             if response.status_code == 200:
-                submissions = response.json()
+                submissions = response.json()['results']
                 self.log(f"✅ Lista de submissões obtida: {len(submissions)} submissões")
                 for submission in submissions[:5]:  # Mostra apenas as 5 primeiras
                     student = submission.get('student', {})
@@ -209,7 +209,7 @@ class ProfessorAPITester:
             self.print_request_info("GET", url, response)
             
             if response.status_code == 200:
-                questions = response.json()
+                questions = response.json()['results']
                 self.log(f"✅ Lista de questões obtida: {len(questions)} questões")
                 for question in questions[:3]:  # Mostra apenas as 3 primeiras
                     self.log(f"   - ID: {question.get('id')} - {question.get('text', 'N/A')[:50]}...")
@@ -117,7 +117,7 @@ class APITester:
             self.print_request_info("GET", url, response)
             
             if response.status_code == 200:
-                users = response.json()
+                users = response.json()['results']
                 self.log(f"✅ Lista de usuários obtida: {len(users)} usuários")
                 for user in users[:3]:  # Mostra apenas os 3 primeiros
                     self.log(f"   - {user.get('username')} ({user.get('email', 'N/A')})")
@@ -139,7 +139,7 @@ class APITester:
             self.print_request_info("GET", url, response)
             
             if response.status_code == 200:
-                courses = response.json()
+                courses = response.json()['results']
                 self.log(f"✅ Lista de cursos obtida: {len(courses)} cursos")
                 self.courses = courses
                 for course in courses[:3]:  # Mostra apenas os 3 primeiros